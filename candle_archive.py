@@ -0,0 +1,113 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+# 레코드 1개 = 봉 1개 (ts: 봉 시작 시각, UTC epoch 초)
+CANDLE_DTYPE = np.dtype([
+    ("ts", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+])
+EPOCH = pd.Timestamp(0, tz="UTC")
+
+
+class CandleArchive:
+    """
+    시장/주기/종목별 append-only 캔들 아카이브.
+    {root}/{market}/{interval}/{symbol}.bin 에 고정 길이 레코드(CANDLE_DTYPE)를 시간순으로 이어 붙이고,
+    읽을 때는 np.memmap 으로 열어 복사 없이 구간을 잘라 반환한다.
+    """
+    def __init__(self, root="candles", tz="Asia/Seoul"):
+        self.root = root
+        self.tz = tz
+        self.lock = threading.Lock()
+        self.last_ts = {}
+
+    def path(self, market, interval, symbol):
+        return os.path.join(self.root, market, interval, f"{symbol}.bin")
+
+    def _last_ts(self, path):
+        if path in self.last_ts: return self.last_ts[path]
+        last = -1
+        try:
+            n = os.path.getsize(path) // CANDLE_DTYPE.itemsize
+            if n > 0:
+                with open(path, 'rb') as f:
+                    f.seek((n - 1) * CANDLE_DTYPE.itemsize)
+                    last = int(np.frombuffer(f.read(CANDLE_DTYPE.itemsize), dtype=CANDLE_DTYPE)["ts"][0])
+        except OSError:
+            pass
+        self.last_ts[path] = last
+        return last
+
+    def append(self, market, interval, symbol, records):
+        """CANDLE_DTYPE 배열 중 마지막 기록 이후 봉만 추가하고 추가한 개수를 반환"""
+        path = self.path(market, interval, symbol)
+        with self.lock:
+            last = self._last_ts(path)
+            records = records[records["ts"] > last]
+            if len(records) == 0: return 0
+            records = np.sort(records, order="ts")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'ab') as f:
+                f.write(records.tobytes())
+            self.last_ts[path] = int(records["ts"][-1])
+            return len(records)
+
+    def append_frame(self, market, interval, symbol, df, closed_only=True):
+        """
+        open/high/low/close/volume 컬럼과 DatetimeIndex 를 가진 DataFrame 기록.
+        closed_only 이면 가장 최근 봉(아직 진행 중)은 제외하고, 다음 조회 때 완성된 봉으로 기록된다.
+        """
+        if df is None or len(df) == 0: return 0
+        df = df.sort_index()
+        if closed_only: df = df.iloc[:-1]
+        if len(df) == 0: return 0
+
+        idx = df.index
+        if idx.tz is None: idx = idx.tz_localize(self.tz)
+        ts = ((idx - EPOCH) // pd.Timedelta(seconds=1)).to_numpy(dtype="i8")
+
+        # 새 봉이 없으면 배열 변환 없이 종료 (대부분의 조회가 여기서 끝남)
+        with self.lock:
+            if int(ts[-1]) <= self._last_ts(self.path(market, interval, symbol)): return 0
+
+        rec = np.empty(len(df), dtype=CANDLE_DTYPE)
+        rec["ts"] = ts
+        for col in ("open", "high", "low", "close", "volume"):
+            rec[col] = df[col].to_numpy(dtype="f8")
+        return self.append(market, interval, symbol, rec)
+
+    def read(self, market, interval, symbol, start=None, end=None):
+        """[start, end) 구간(epoch 초)의 레코드를 memmap 뷰로 반환 (복사 없음)"""
+        path = self.path(market, interval, symbol)
+        try:
+            n = os.path.getsize(path) // CANDLE_DTYPE.itemsize
+        except OSError:
+            n = 0
+        if n == 0: return np.empty(0, dtype=CANDLE_DTYPE)
+
+        mm = np.memmap(path, dtype=CANDLE_DTYPE, mode='r', shape=(n,))
+        ts = mm["ts"]
+        lo = 0 if start is None else int(np.searchsorted(ts, start, side="left"))
+        hi = n if end is None else int(np.searchsorted(ts, end, side="left"))
+        return mm[lo:hi]
+
+    def tail(self, market, interval, symbol, count):
+        """최근 count 개 봉 (memmap 뷰)"""
+        rec = self.read(market, interval, symbol)
+        return rec[-count:] if count else rec[:0]
+
+    def symbols(self, market, interval):
+        d = os.path.join(self.root, market, interval)
+        if not os.path.isdir(d): return []
+        return sorted(f[:-4] for f in os.listdir(d) if f.endswith(".bin"))
+
+
+# 두 봇이 함께 쓰는 공용 아카이브
+archive = CandleArchive(os.environ.get("CANDLE_ARCHIVE_DIR", "candles"))
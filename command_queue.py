@@ -0,0 +1,61 @@
+import itertools
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+
+class CommandQueue:
+    """
+    API 요청으로 들어온 거래소 작업(매도, 모드 변경 등)을 전용 워커 스레드에서 순서대로 실행하는 큐.
+    submit() 은 즉시 job id 를 반환하고, 진행 상태/결과는 get() 으로 조회한다.
+    완료된 작업은 최근 max_jobs 건만 보관한다.
+    """
+    def __init__(self, name="commands", max_jobs=200):
+        self.name = name
+        self.max_jobs = max_jobs
+        self.q = queue.Queue()
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.thread = None
+
+    def submit(self, kind, fn, *args, **kwargs):
+        """작업 등록 후 job id 반환 (블로킹 없음)"""
+        job_id = f"{int(time.time())}-{next(self.ids)}"
+        job = {"id": job_id, "kind": kind, "status": "queued", "created_at": time.time(),
+               "started_at": None, "finished_at": None, "result": None, "error": None}
+        with self.lock:
+            self.jobs[job_id] = job
+            while len(self.jobs) > self.max_jobs:
+                oldest = next(iter(self.jobs))
+                if self.jobs[oldest]["status"] in ("queued", "running"): break
+                self.jobs.popitem(last=False)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self.thread.start()
+        self.q.put((job_id, fn, args, kwargs))
+        return job_id
+
+    def get(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def pending(self):
+        return self.q.qsize()
+
+    def _run(self):
+        while True:
+            job_id, fn, args, kwargs = self.q.get()
+            self._update(job_id, status="running", started_at=time.time())
+            try:
+                result = fn(*args, **kwargs)
+                self._update(job_id, status="done", result=result, finished_at=time.time())
+            except Exception as e:
+                print(f"[ERROR] 작업 실패({job_id}): {e}")
+                self._update(job_id, status="error", error=str(e), finished_at=time.time())
+
+    def _update(self, job_id, **fields):
+        with self.lock:
+            if job_id in self.jobs: self.jobs[job_id].update(fields)
@@ -15,3 +15,6 @@ CHAT_ID = os.getenv("TELEGRAM_CHAT_ID", "")
 # 매매 기본 설정
 TRADE_AMOUNT = int(os.getenv("TRADE_AMOUNT", "100000"))  # 1회 매수 금액
 MAX_COIN_COUNT = int(os.getenv("MAX_COIN_COUNT", "3"))     # 최대 보유 종목 수
+
+# 상태 파일 저장 주기 (초): 이 시간 동안의 변경을 모아서 한 번에 기록
+STATE_PERSIST_INTERVAL = float(os.getenv("STATE_PERSIST_INTERVAL", "2.0"))
@@ -1484,3 +1484,42 @@ def inquire_investor(
         res.printError(url=api_url)
         return pd.DataFrame()
 
+
+
+##############################################################################################
+# [국내주식] 실시간시세 > 국내주식 실시간체결가 (KRX) [실시간-003]
+##############################################################################################
+
+def ccnl_krx(
+        tr_type: str,  # 등록/해제 ("1": 등록, "2": 해제)
+        tr_key: str,  # 종목코드 (예: 005930)
+        env_dv: str = "real",  # 실전모의구분 (real:실전, demo:모의)
+) -> Tuple[dict, list]:
+    """
+    [국내주식] 실시간시세
+    국내주식 실시간체결가 (KRX) 웹소켓 구독 요청 메시지와 수신 데이터 컬럼 목록을 반환합니다.
+    kis_auth.KISWebSocket.subscribe / send 에 request 로 넘겨 사용합니다.
+    """
+    if tr_type == "":
+        raise ValueError("tr_type is required")
+    if tr_key == "":
+        raise ValueError("tr_key is required")
+    if env_dv not in ("real", "demo"):
+        raise ValueError("env_dv can only be 'real' or 'demo'")
+
+    tr_id = "H0STCNT0"
+    msg = ka.data_fetch(tr_id, tr_type, {"tr_key": tr_key})
+
+    columns = [
+        "MKSC_SHRN_ISCD", "STCK_CNTG_HOUR", "STCK_PRPR", "PRDY_VRSS_SIGN", "PRDY_VRSS", "PRDY_CTRT",
+        "WGHN_AVRG_STCK_PRC", "STCK_OPRC", "STCK_HGPR", "STCK_LWPR", "ASKP1", "BIDP1", "CNTG_VOL",
+        "ACML_VOL", "ACML_TR_PBMN", "SELN_CNTG_CSNU", "SHNU_CNTG_CSNU", "NTBY_CNTG_CSNU", "CTTR",
+        "SELN_CNTG_SMTN", "SHNU_CNTG_SMTN", "CCLD_DVSN", "SHNU_RATE", "PRDY_VOL_VRSS_ACML_VOL_RATE",
+        "OPRC_HOUR", "OPRC_VRSS_PRPR_SIGN", "OPRC_VRSS_PRPR", "HGPR_HOUR", "HGPR_VRSS_PRPR_SIGN",
+        "HGPR_VRSS_PRPR", "LWPR_HOUR", "LWPR_VRSS_PRPR_SIGN", "LWPR_VRSS_PRPR", "BSOP_DATE",
+        "NEW_MKOP_CLS_CODE", "TRHT_YN", "ASKP_RSQN1", "BIDP_RSQN1", "TOTAL_ASKP_RSQN", "TOTAL_BIDP_RSQN",
+        "VOL_TNRT", "PRDY_SMNS_HOUR_ACML_VOL", "PRDY_SMNS_HOUR_ACML_VOL_RATE", "HOUR_CLS_CODE",
+        "MRKT_TRTM_CLS_CODE", "VI_STND_PRC",
+    ]
+
+    return msg, columns
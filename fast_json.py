@@ -0,0 +1,31 @@
+import dataclasses
+import json
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+def _default(obj):
+    if dataclasses.is_dataclass(obj):
+        return {f.name: getattr(obj, f.name) for f in dataclasses.fields(obj)}
+    if hasattr(obj, "tolist"):  # numpy 배열/스칼라 (pandas 집계 값 등)
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj):
+    """
+    obj -> UTF-8 JSON 바이트 (orjson 설치 시 사용). dataclass 레코드는 필드 dict 로 직렬화.
+    두 경로 모두 숫자 키는 문자열로, numpy 값은 파이썬 숫자/리스트로 바꿔 같은 결과를 낸다
+    """
+    if HAS_ORJSON:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+def dumps_fields(obj):
+    """dict -> 중괄호를 뗀 '"k":v,...' 조각 (섹션을 따로 직렬화해 두고 이어 붙이기 위함)"""
+    return dumps(obj)[1:-1]
@@ -2,7 +2,6 @@ import pyupbit
 import time
 import json
 import os
-import csv
 import threading
 import uvicorn
 import requests
@@ -11,10 +10,21 @@ from datetime import datetime, date
 from typing import Optional, List
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi.responses import JSONResponse, HTMLResponse, Response, StreamingResponse
 from contextlib import asynccontextmanager
 from pydantic import BaseModel
 import config
+from state_journal import StateJournal, DebouncedPersister, atomic_write_json
+from trade_journal import journal as trade_journal
+from trade_store import store as trade_store
+from candle_archive import archive as candle_archive
+from notifier import TelegramNotifier
+from log_buffer import LogBuffer
+from push_hub import EventHub, SSE_HEADERS
+from static_assets import StaticPage
+from command_queue import CommandQueue
+
+_BOOT_TS = time.perf_counter()  # 기동 시간 측정 기준점
 
 # ============================================================
 # ✅ 프론트(index.html) : QUANTUM TRADER UI + Settings Modal
@@ -74,6 +84,38 @@ INDEX_HTML = r"""<!DOCTYPE html>
   <script type="text/babel">
     const { useState, useEffect } = React;
 
+    // 로그는 /api/logs?since= 로 새 항목만 받아 누적
+    const logCache = { boot: '', seq: 0, list: [], capacity: 150 };
+    const applyLogs = (r) => {
+      // 서버가 재시작됐으면(boot 변경) seq 가 이어지지 않으므로 보관 중인 로그를 버림
+      const reset = r.reset || (r.boot !== undefined && r.boot !== logCache.boot);
+      const fresh = reset ? r.logs : r.logs.filter(l => l.seq > logCache.seq);
+      logCache.list = (reset ? fresh : [...fresh, ...logCache.list]).slice(0, r.capacity);
+      logCache.seq = Math.max(reset ? 0 : logCache.seq, r.seq);
+      logCache.boot = r.boot;
+      logCache.capacity = r.capacity;
+      return logCache.list;
+    };
+    const pushLog = (l) => {
+      if (l.seq <= logCache.seq) return logCache.list;
+      logCache.list = [l, ...logCache.list].slice(0, logCache.capacity);
+      logCache.seq = l.seq;
+      return logCache.list;
+    };
+
+    // 상태는 보유 중인 섹션 버전을 넘겨 바뀐 섹션만 받고, 새 로그도 함께 받음 (newLogs)
+    const statusCache = { boot: '', versions: {} };
+    const fetchStatus = async (origin) => {
+      const q = new URLSearchParams({ boot: statusCache.boot, logs: logCache.seq });
+      ['balance', 'positions', 'history', 'config'].forEach(k => { if (statusCache.versions[k] !== undefined) q.set(k, statusCache.versions[k]); });
+      const r = await fetch(`${origin}/api/status?${q}`).then(r => r.json());
+      statusCache.boot = r.boot;
+      statusCache.versions = r.versions || {};
+      if (r.newLogs) applyLogs(r.newLogs);
+      delete r.newLogs;
+      return r;
+    };
+
     const Icon = ({ name, size = 16, className = "" }) => {
       useEffect(() => { if (window.lucide) lucide.createIcons(); }, [name]);
       return <i data-lucide={name} className={className} style={{ width: size, height: size }}></i>;
@@ -205,11 +247,11 @@ INDEX_HTML = r"""<!DOCTYPE html>
         try {
           const origin = window.location.origin;
           const [resStatus, resMarket, resTrending] = await Promise.all([
-            fetch(`${origin}/api/status`).then(r => r.json()),
+            fetchStatus(origin),
             fetch(`${origin}/api/market`).then(r => r.json()),
             fetch(`${origin}/api/trending`).then(r => r.json())
           ]);
-          setStatus(resStatus);
+          setStatus(s => ({ ...s, ...resStatus, logs: logCache.list }));
           setMarket(resMarket);
           setTrending(resTrending);
         } catch (e) { }
@@ -217,8 +259,24 @@ INDEX_HTML = r"""<!DOCTYPE html>
 
       useEffect(() => {
         fetchData();
-        const timer = setInterval(fetchData, 3000);
-        return () => clearInterval(timer);
+        // 상태/로그는 /api/stream(SSE) 으로 받고, 연결이 끊기면 다시 붙을 때까지 3초 폴링
+        let fast = null;
+        const slow = setInterval(fetchData, 15000);
+        const startPolling = () => { if (!fast) fast = setInterval(fetchData, 3000); };
+        const stopPolling = () => { clearInterval(fast); fast = null; };
+        if (!window.EventSource) {
+          startPolling();
+          return () => { stopPolling(); clearInterval(slow); };
+        }
+        const es = new EventSource(`${window.location.origin}/api/stream`);
+        es.onopen = stopPolling;
+        es.onerror = startPolling;
+        es.addEventListener('status', e => { const d = JSON.parse(e.data); setStatus(s => ({ ...s, ...d })); });
+        es.addEventListener('logs', e => { const list = applyLogs(JSON.parse(e.data)); setStatus(s => ({ ...s, logs: list })); });
+        es.addEventListener('log', e => { const list = pushLog(JSON.parse(e.data)); setStatus(s => ({ ...s, logs: list })); });
+        es.addEventListener('market', e => setMarket(JSON.parse(e.data)));
+        es.addEventListener('trending', e => setTrending(JSON.parse(e.data)));
+        return () => { es.close(); stopPolling(); clearInterval(slow); };
       }, []);
 
       const toggleBot = async (cmd) => {
@@ -254,11 +312,26 @@ INDEX_HTML = r"""<!DOCTYPE html>
         } catch(e) { alert("Save failed: " + e.message); }
       };
 
+      // 거래소 작업은 job id 로 접수되므로 완료될 때까지 /api/jobs/{id} 조회
+      const waitJob = async (id, timeoutMs = 30000) => {
+        const until = Date.now() + timeoutMs;
+        while (Date.now() < until) {
+          const j = await fetch(`${window.location.origin}/api/jobs/${id}`).then(r => r.json());
+          if (j.status === 'done' || j.status === 'error') return j;
+          await new Promise(r => setTimeout(r, 500));
+        }
+        return null;
+      };
+
       const sellAll = async (ticker) => {
         if(!window.confirm(`${ticker} 매도하시겠습니까?`)) return;
         setSellBusy(prev => ({ ...prev, [ticker]: true }));
         try {
-          await postJSON(`${window.location.origin}/api/sell_one`, { ticker });
+          const res = await postJSON(`${window.location.origin}/api/sell_one`, { ticker });
+          if (res.job_id) {
+            const job = await waitJob(res.job_id);
+            if (job && job.status === 'error') alert(`매도 실패: ${job.error}`);
+          }
           await fetchData();
         } catch (e) { alert(e.message); }
         finally { setSellBusy(prev => ({ ...prev, [ticker]: false })); }
@@ -569,11 +642,18 @@ INDEX_HTML = r"""<!DOCTYPE html>
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup logic (if any)
+    # Startup: API 는 바로 서비스하고, 네트워크가 필요한 준비 작업은 백그라운드로
+    bot.startup_stats["ready_sec"] = round(time.perf_counter() - _BOOT_TS, 3)
+    threading.Thread(target=bot.warm_up, name="warm-up", daemon=True).start()
+    threading.Thread(target=market_refresher, name="market-refresher", daemon=True).start()
+    threading.Thread(target=trending_refresher, name="trending-refresher", daemon=True).start()
     yield
     # Shutdown logic
     global shutting_down
     shutting_down = True
+    bot.close_state()
+    trade_journal.close()
+    notifier.close()
 
 # ====== FastAPI 설정 ======
 app = FastAPI(lifespan=lifespan)
@@ -587,6 +667,8 @@ app.add_middleware(
 )
 
 shutting_down = False
+notifier = TelegramNotifier(config.TELEGRAM_TOKEN, config.CHAT_ID)
+hub = EventHub()
 
 @app.middleware("http")
 async def handle_cancelled(request: Request, call_next):
@@ -624,6 +706,7 @@ class PriceCache:
         self.ttl = ttl_sec
         self.data = {}
         self.lock = threading.Lock()
+        self.listeners = []  # set() 후 호출할 함수 fn(ticker)
     def get(self, ticker):
         now = time.time()
         with self.lock:
@@ -632,9 +715,15 @@ class PriceCache:
             ts, price = v
             if now - ts > self.ttl: return None
             return price
+    def peek(self, ticker):
+        """TTL 과 무관하게 마지막으로 받은 가격 (네트워크 조회 없음)"""
+        with self.lock:
+            v = self.data.get(ticker)
+            return v[1] if v else None
     def set(self, ticker, price):
         with self.lock:
             self.data[ticker] = (time.time(), price)
+        for fn in self.listeners: fn(ticker)
 
 price_cache = PriceCache(ttl_sec=3)
 
@@ -664,7 +753,10 @@ def get_ohlcv_safe(ticker: str, interval="minute3", count=50, retries=3):
     for _ in range(retries):
         try:
             df = pyupbit.get_ohlcv(ticker, interval=interval, count=count)
-            if df is not None and len(df) >= 20: return df
+            if df is not None and len(df) >= 20:
+                try: candle_archive.append_frame("upbit", interval, ticker, df)
+                except Exception as e: print(f"[ERROR] 캔들 아카이브 기록 실패({ticker}): {e}")
+                return df
         except: pass
         safe_sleep(delay)
         delay *= 2
@@ -672,7 +764,7 @@ def get_ohlcv_safe(ticker: str, interval="minute3", count=50, retries=3):
 
 def fetch_top_markets_by_trade_price(top_n=20):
     try:
-        markets = pyupbit.get_tickers(fiat="KRW")
+        markets = bot.refresh_markets() or bot.valid_markets
         if not markets: return []
         url = "https://api.upbit.com/v1/ticker"
         chunks = [markets[i:i + 100] for i in range(0, len(markets), 100)]
@@ -703,24 +795,26 @@ def fetch_recent_trades(ticker: str, count=30):
     except: pass
     return None
 
-def get_major_crypto_trends():
+MAJOR_COINS = [
+    ("KRW-BTC", "Bitcoin"),
+    ("KRW-ETH", "Ethereum"),
+    ("KRW-XRP", "Ripple"),
+    ("KRW-ADA", "Cardano"),
+    ("KRW-SOL", "Solana"),
+    ("KRW-DOGE", "Dogecoin")
+]
+
+def get_major_crypto_trends(indicators=None):
     """
-    주요 암호화폐의 실시간 추세 데이터를 반환
+    주요 암호화폐의 실시간 추세 데이터를 반환 (/v1/ticker 1회 조회)
+    indicators: ticker -> (rsi, pump) 캐시 (없는 종목은 rsi None)
     Returns: List of dicts with ticker, name, price, change_rate, volume_24h, rsi, trend
     """
-    major_coins = [
-        ("KRW-BTC", "Bitcoin"),
-        ("KRW-ETH", "Ethereum"),
-        ("KRW-XRP", "Ripple"),
-        ("KRW-ADA", "Cardano"),
-        ("KRW-SOL", "Solana"),
-        ("KRW-DOGE", "Dogecoin")
-    ]
-    
+    indicators = indicators or {}
     results = []
     try:
         # Upbit API로 가격 정보 조회
-        tickers = [coin[0] for coin in major_coins]
+        tickers = [coin[0] for coin in MAJOR_COINS]
         url = "https://api.upbit.com/v1/ticker"
         r = requests.get(url, params={"markets": ",".join(tickers)}, timeout=3)
         
@@ -729,7 +823,7 @@ def get_major_crypto_trends():
         
         price_data = {item["market"]: item for item in r.json()}
         
-        for ticker, name in major_coins:
+        for ticker, name in MAJOR_COINS:
             if ticker not in price_data:
                 continue
                 
@@ -737,9 +831,9 @@ def get_major_crypto_trends():
             price = data.get("trade_price", 0)
             change_rate = data.get("signed_change_rate", 0) * 100  # Convert to percentage
             volume_24h = data.get("acc_trade_price_24h", 0)
+            if price: price_cache.set(ticker, float(price))
             
-            # RSI 계산
-            rsi, ma, px, pump, ma5, open_p = get_indicators(ticker)
+            rsi, pump = indicators.get(ticker, (None, False))
             
             # 추세 판단
             if pump:
@@ -768,6 +862,19 @@ def get_major_crypto_trends():
     return results
 
 # ====== 봇 상태 ======
+# /api/status 섹션 구성 (섹션 단위로 버전을 매겨 바뀐 섹션만 응답), STATUS_CORE_KEYS 는 항상 포함
+STATUS_SECTIONS = {
+    "balance": ("balance", "start_balance"),
+    "positions": ("positions",),
+    "history": ("history",),
+    "config": ("config",),
+}
+STATUS_CORE_KEYS = ("isRunning", "mode", "logSeq")
+
+def _json_frag(key, value):
+    """JSON 객체의 "key":value 조각 (섹션을 미리 직렬화해 두고 이어 붙이기 위함)"""
+    return json.dumps(key).encode() + b":" + json.dumps(value, ensure_ascii=False, default=str).encode("utf-8")
+
 class BotState:
     def __init__(self):
         self.lock = threading.RLock()
@@ -793,13 +900,18 @@ class BotState:
         self.paper_bought_coins = {}
         self.paper_balance = 1_000_000.0
         self.balance_history = []
-        self.logs = []
+        self.logs = LogBuffer(150)
         self.target_tickers = []
+        self.market_rows = {}  # ticker -> 감시 종목 지표 행 (매수 스캔/백그라운드 갱신 결과)
+        self.market_row_ttl = 30
+        self.market_dirty = False
+        self.market_view = []  # /api/market 응답용 (publish_market 이 교체)
+        self.trending = []  # 주요 코인 추세표 (trending_refresher 가 교체)
         self.last_report_time = time.time()
         self.day_key = date.today().isoformat()
         self.day_start_balance_real = None
         self.day_start_balance_paper = 1_000_000.0
-        self.upbit = pyupbit.Upbit(config.ACCESS_KEY, config.SECRET_KEY)
+        self._upbit = None
         self.protect_last_alert = {}
         self.buy_fail_cooldown = {}
         self.buy_fail_cooldown_sec = 60
@@ -838,9 +950,83 @@ class BotState:
         self.protect_sell_info = {}
         self.protect_stop_loss = -5.0
 
+        # 포지션 상태 저널 (매 거래마다 변경분만 append, 주기적으로 json 스냅샷으로 압축)
+        self.journal = StateJournal("state_journal.log", fsync_interval=1.0, compact_every=500)
+        self.state_seq = 0
+        # 저장 요청은 persist_interval_sec 동안 모아서 한 번에 기록 (critical 이벤트는 즉시)
+        self.persist_interval_sec = config.STATE_PERSIST_INTERVAL
+        self.persister = DebouncedPersister(self._persist_state, interval=self.persist_interval_sec)
+
+        # 기동은 로컬 단계(상태/캐시 로드)만 수행하고, 네트워크 검증은 warm_up() 에서 백그라운드로 처리
+        self.markets_cache_file = "markets_cache.json"
+        self.valid_markets = self.load_markets_cache()
+        self.warm_event = threading.Event()
+        self.startup_stats = {}
+
         self.load_state()
-        self.sanitize_positions()
         self.init_trade_logs()
+        self.status_bytes = None
+        self.boot_id = str(int(time.time() * 1000))  # 재시작 구분용 (버전 번호가 다시 1부터 시작하므로)
+        self.section_frags = {}
+        self.section_ver = {}
+        self.status_parts = None
+        self.last_status = {}
+        self.publish_lock = threading.Lock()
+        # 보유 코인 시세가 갱신되면 루프 종료를 기다리지 않고 스냅샷 재게시 (status_publish_interval 초 단위로 묶음)
+        self.status_publish_interval = 1.0
+        self.status_publisher = DebouncedPersister(self.publish_status, interval=self.status_publish_interval, name="status-publisher")
+        price_cache.listeners.append(self.on_price_update)
+        self.publish_status()
+        self.startup_stats["local_sec"] = round(time.perf_counter() - _BOOT_TS, 3)
+
+    @property
+    def upbit(self):
+        # 업비트 클라이언트는 첫 사용 시 생성
+        if self._upbit is None:
+            self._upbit = pyupbit.Upbit(config.ACCESS_KEY, config.SECRET_KEY)
+        return self._upbit
+
+    def load_markets_cache(self):
+        try:
+            with open(self.markets_cache_file, 'r', encoding='utf-8') as f:
+                return list(json.load(f).get("markets", []))
+        except: return []
+
+    def refresh_markets(self):
+        """KRW 마켓 목록 조회 후 목록이 바뀌었을 때만 디스크 캐시 갱신 (실패 시 None)"""
+        try:
+            markets = pyupbit.get_tickers(fiat="KRW") or []
+        except: markets = []
+        if not markets: return None
+        with self.lock:
+            changed = set(markets) != set(self.valid_markets)
+            self.valid_markets = list(markets)
+        if not changed: return markets
+        try: atomic_write_json(self.markets_cache_file, {"time": time.time(), "markets": markets}, indent=None)
+        except Exception as e: print(f"[ERROR] 마켓 캐시 저장 실패: {e}")
+        return markets
+
+    def warm_up(self):
+        """백그라운드 준비 단계: 마켓 검증 -> 포지션 정리 -> 보유 코인 캔들/시세 선조회"""
+        t0 = time.perf_counter()
+        try:
+            markets = self.refresh_markets()
+            # 조회 실패 시 캐시된 목록으로 정리 (캐시도 없으면 기존 포지션 유지, 재조회하지 않음)
+            self.sanitize_positions(markets or list(self.valid_markets))
+
+            with self.lock:
+                held = set(self.real_bought_coins) | set(self.paper_bought_coins) | set(self.protect_tickers)
+            for t in held:
+                if self.valid_markets and t not in self.valid_markets: continue
+                get_current_price_safe(t)
+                get_ohlcv_safe(t, count=60)
+        except Exception as e:
+            self.log(f"워밍업 오류: {e}", "ERROR")
+        finally:
+            self.startup_stats["warmup_sec"] = round(time.perf_counter() - t0, 3)
+            self.warm_event.set()
+            self.log(f"기동 완료: 로컬 {self.startup_stats.get('local_sec')}s, "
+                     f"API 준비 {self.startup_stats.get('ready_sec')}s, 워밍업 {self.startup_stats['warmup_sec']}s", "INFO")
 
     def load_system_config(self):
         defaults = {
@@ -881,84 +1067,166 @@ class BotState:
                 json.dump(data, f, indent=4, ensure_ascii=False)
         except: pass
 
-    def send_telegram(self, msg):
-        if config.TELEGRAM_TOKEN and config.CHAT_ID:
+    def build_status(self):
+        """대시보드 상태 (캐시된 시세만 사용, 네트워크 조회 없음)"""
+        with self.lock:
+            is_real = self.mode == "real"
+            coins = self.real_bought_coins if is_real else self.paper_bought_coins
+
+            pos_list = []
+            now_ts = time.time()
+
+            for t, info in coins.items():
+                cur = price_cache.peek(t) or info.get("buy_price", 0)
+                buy = float(info.get("buy_price", 0) or 0)
+                if buy <= 0 or not cur: continue
+
+                profit_rate = (cur - buy) / buy * 100
+                amt = float(info.get("amount", 0) or 0)
+                buy_time = float(info.get("buy_time", now_ts) or now_ts)
+                held_min = round((now_ts - buy_time) / 60)  # 분 단위 (매 게시마다 positions 버전이 바뀌지 않도록)
+                high = float(info.get("high_price", buy) or buy)
+                dd_from_high = (cur - high) / high * 100
+                cd_left = max(0, int((self.sell_cooldown.get(t, 0) or 0) - now_ts))
+
+                pos_list.append({
+                    "ticker": t, "buy_price": buy, "cur_price": float(cur), "profit_rate": float(profit_rate),
+                    "amount": float(amt), "held_min": float(held_min), "high_price": float(high),
+                    "dd_from_high": float(dd_from_high), "cooldown_left_sec": cd_left,
+                    "is_protect": (t in self.protect_tickers),
+                })
+
+            start_bal = self.day_start_balance_real if is_real else self.day_start_balance_paper
+
+            return {
+                "isRunning": self.is_running, "mode": self.mode,
+                "balance": self.real_balance if is_real else self.paper_balance,
+                "start_balance": start_bal, "positions": pos_list,
+                "history": list(self.balance_history), "logSeq": self.logs.seq,
+                "config": {
+                    "market": self.market_status, "targetProfit": self.target_profit, "stopLoss": self.stop_loss,
+                    "rsiThreshold": self.rsi_threshold, "autoTune": self.auto_tune,
+                    "protectTickers": list(self.protect_tickers), "blackList": list(self.black_list),
+                    "stopTickers": list(self.stop_tickers), "maxHoldMinutes": self.max_hold_minutes
+                }
+            }
+
+    def publish_status(self):
+        """
+        상태 스냅샷을 JSON 바이트로 직렬화해 교체 게시 (/api/status 는 이 값을 그대로 반환).
+        푸시 구독자에게는 직전 스냅샷 대비 바뀐 항목만 보낸다.
+        """
+        with self.publish_lock:
             try:
-                requests.get(f"https://api.telegram.org/bot{config.TELEGRAM_TOKEN}/sendMessage", params={"chat_id": config.CHAT_ID, "text": msg}, timeout=3)
-            except: pass
+                status = self.build_status()
+                frags = {k: _json_frag(k, v) for k, v in status.items()}
+            except Exception as e:
+                print(f"[ERROR] 상태 스냅샷 생성 실패: {e}")
+                return self.status_bytes or b"{}"
+
+            # 섹션별 버전: 직렬화 결과가 바뀐 섹션만 버전 증가
+            for name, keys in STATUS_SECTIONS.items():
+                enc = b",".join(frags[k] for k in keys)
+                if enc != self.section_frags.get(name):
+                    self.section_frags[name] = enc
+                    self.section_ver[name] = self.section_ver.get(name, 0) + 1
+            versions = dict(self.section_ver, logs=status["logSeq"])
+            core = b",".join([_json_frag("boot", self.boot_id), _json_frag("versions", versions)] +
+                             [frags[k] for k in STATUS_CORE_KEYS])
+            self.status_parts = (core, dict(self.section_frags), dict(self.section_ver))
+            data = b"{" + b",".join([core] + [self.section_frags[n] for n in STATUS_SECTIONS]) + b"}"
+            self.status_bytes = data
+
+            delta = {k: v for k, v in status.items() if self.last_status.get(k) != v}
+            self.last_status = status
+            hub.set_snapshot("status", data)
+            if delta: hub.publish("status", delta)
+            return data
+
+    def on_price_update(self, ticker):
+        """현재 모드의 보유 코인 시세가 바뀌면 상태 재게시 예약"""
+        coins = self.real_bought_coins if self.mode == "real" else self.paper_bought_coins
+        if ticker in coins: self.status_publisher.mark_dirty()
+
+    def record_market_row(self, ticker, rsi, ma, px, pump, risky, why):
+        """스캔에서 계산한 지표를 /api/market 테이블 행으로 보관"""
+        trend = "급등" if pump else ("상승세" if px > ma else "하락세")
+        row = {"ticker": ticker, "rsi": rsi, "trend": trend, "risky": risky, "why": why, "updated_at": time.time()}
+        with self.lock:
+            self.market_rows[ticker] = row
+            self.market_dirty = True
+
+    def market_table(self):
+        with self.lock:
+            targets = self.target_tickers[:8]
+            return [dict(self.market_rows[t]) for t in targets if t in self.market_rows]
+
+    def publish_market(self, force=False):
+        """테이블이 바뀌었으면 market_view 를 교체하고 푸시 구독자에게 전송"""
+        with self.lock:
+            if not (self.market_dirty or force): return
+            self.market_dirty = False
+        self.market_view = self.market_table()
+        hub.publish("market", self.market_view, snapshot=True)
+
+    def send_telegram(self, msg):
+        notifier.send(msg)
 
     def log(self, msg, type="INFO"):
         ts = datetime.now().strftime('%H:%M:%S')
-        log_entry = {"id": f"{ts}-{len(self.logs)}", "timestamp": ts, "type": type, "message": str(msg)}
         print(f"[{ts}] [{self.mode.upper()}] {str(msg)}")
-        with self.lock:
-            self.logs.insert(0, log_entry)
-            self.logs = self.logs[:150]
+        entry = {"timestamp": ts, "type": type, "message": str(msg)}
+        self.logs.append(entry)
+        hub.publish("log", entry)
         if type in ["BUY", "SELL", "ERROR", "SYSTEM", "REPORT", "RISK"]:
             self.send_telegram(f"[{type}] {msg}")
 
     def init_trade_logs(self):
-        """CSV 로그 파일 초기화 (헤더 생성)"""
-        buy_log_file = "trade_buy_log.csv"
-        sell_log_file = "trade_sell_log.csv"
-        
-        # 매수 로그 파일 초기화
-        if not os.path.exists(buy_log_file):
-            try:
-                with open(buy_log_file, 'w', newline='', encoding='utf-8') as f:
-                    writer = csv.writer(f)
-                    writer.writerow(['timestamp', 'mode', 'ticker', 'buy_price', 'amount', 'reason', 'rsi'])
-            except Exception as e:
-                print(f"[ERROR] 매수 로그 파일 초기화 실패: {e}")
-        
-        # 매도 로그 파일 초기화
-        if not os.path.exists(sell_log_file):
-            try:
-                with open(sell_log_file, 'w', newline='', encoding='utf-8') as f:
-                    writer = csv.writer(f)
-                    writer.writerow(['timestamp', 'mode', 'ticker', 'buy_price', 'sell_price', 'profit_rate', 'profit_amount', 'held_time', 'reason'])
-            except Exception as e:
-                print(f"[ERROR] 매도 로그 파일 초기화 실패: {e}")
+        """CSV 로그 파일 등록 (헤더는 일자별 파일 생성 시 기록)"""
+        trade_journal.register("trade_buy_log.csv", ['timestamp', 'mode', 'ticker', 'buy_price', 'amount', 'reason', 'rsi'])
+        trade_journal.register("trade_sell_log.csv", ['timestamp', 'mode', 'ticker', 'buy_price', 'sell_price', 'profit_rate', 'profit_amount', 'held_time', 'reason'])
 
     def log_buy_transaction(self, ticker, buy_price, amount, reason, rsi=None):
-        """매수 거래를 CSV 파일에 기록"""
+        """매수 거래를 CSV 로그 큐에 추가 (파일 기록은 백그라운드)"""
         try:
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            with open("trade_buy_log.csv", 'a', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow([
-                    timestamp,
-                    self.mode,
-                    ticker,
-                    f"{buy_price:.2f}",
-                    f"{amount:.2f}",
-                    reason,
-                    f"{rsi:.1f}" if rsi else ""
-                ])
+            ts = int(time.time())  # CSV 와 저장소에 같은 시각 기록 (중복 판별 키)
+            timestamp = datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
+            trade_journal.append("trade_buy_log.csv", [
+                timestamp,
+                self.mode,
+                ticker,
+                f"{buy_price:.2f}",
+                f"{amount:.2f}",
+                reason,
+                f"{rsi:.1f}" if rsi else ""
+            ])
+            trade_store.record_trade("crypto", "BUY", ticker, buy_price, mode=self.mode, amount=amount, reason=reason, rsi=rsi, ts=ts)
         except Exception as e:
             print(f"[ERROR] 매수 로그 기록 실패: {e}")
 
     def log_sell_transaction(self, ticker, buy_price, sell_price, profit_rate, profit_amount, held_time, reason):
-        """매도 거래를 CSV 파일에 기록"""
+        """매도 거래를 CSV 로그 큐에 추가 (파일 기록은 백그라운드)"""
         try:
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            with open("trade_sell_log.csv", 'a', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow([
-                    timestamp,
-                    self.mode,
-                    ticker,
-                    f"{buy_price:.2f}",
-                    f"{sell_price:.2f}",
-                    f"{profit_rate:.2f}",
-                    f"{profit_amount:.2f}",
-                    f"{held_time:.2f}",
-                    reason
-                ])
+            ts = int(time.time())  # CSV 와 저장소에 같은 시각 기록 (중복 판별 키)
+            timestamp = datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
+            trade_journal.append("trade_sell_log.csv", [
+                timestamp,
+                self.mode,
+                ticker,
+                f"{buy_price:.2f}",
+                f"{sell_price:.2f}",
+                f"{profit_rate:.2f}",
+                f"{profit_amount:.2f}",
+                f"{held_time:.2f}",
+                reason
+            ])
+            trade_store.record_trade("crypto", "SELL", ticker, sell_price, mode=self.mode, buy_price=buy_price,
+                                     profit_rate=profit_rate, profit_amount=profit_amount, held_min=held_time, reason=reason, ts=ts)
         except Exception as e:
             print(f"[ERROR] 매도 로그 기록 실패: {e}")
 
     def load_state(self):
+        """스냅샷(json 3종)을 읽은 뒤 상태 저널을 재적용"""
         with self.lock:
             if os.path.exists("bot_state.json"):
                 try:
@@ -982,9 +1250,23 @@ class BotState:
                         self.paper_balance = float(data.get('balance', 1000000))
                 except: pass
 
-    def sanitize_positions(self):
+            state = self._state_sections()
+            try:
+                if self.journal.replay(state) > 0:
+                    self.real_bought_coins = state["real"]
+                    self.paper_bought_coins = state["paper"]
+                    self.protect_sell_info = state["protect"]
+                    self.paper_balance = float(state["meta"].get("paper_balance", self.paper_balance))
+                    self.log(f"상태 저널 복구: {self.journal.records}건 재적용", "INFO")
+                    self.journal.compact(state, 0, self._write_snapshot)
+                else:
+                    self.journal.reset(state)
+            except Exception as e:
+                print(f"[ERROR] 상태 저널 복구 실패: {e}")
+
+    def sanitize_positions(self, markets=None):
         try:
-            valid = set(pyupbit.get_tickers(fiat="KRW") or [])
+            valid = set(markets if markets is not None else (pyupbit.get_tickers(fiat="KRW") or []))
             if not valid:
                 self.log("⚠️ 티커 목록 조회 실패: 기존 포지션 유지 (네트워크 오류 가능성)", "SYSTEM")
                 return
@@ -995,13 +1277,49 @@ class BotState:
             self.save_state()
         except: pass
 
-    def save_state(self):
+    def _state_sections(self):
+        return {
+            "real": {k: dict(v) for k, v in self.real_bought_coins.items()},
+            "paper": {k: dict(v) for k, v in self.paper_bought_coins.items()},
+            "protect": {k: dict(v) for k, v in self.protect_sell_info.items()},
+            "meta": {"paper_balance": self.paper_balance},
+        }
+
+    def _write_snapshot(self, state):
+        atomic_write_json("bot_state.json", state["real"])
+        atomic_write_json("paper_state.json", {"coins": state["paper"], "balance": state["meta"]["paper_balance"]})
+        atomic_write_json("protect_state.json", state["protect"])
+
+    def save_state(self, critical=False):
+        """상태 변경 표시 (저장은 백그라운드에서 모아서 처리), critical 이면 즉시 저장"""
+        self.persister.mark_dirty()
+        if critical: self.persister.flush()
+
+    def _persist_state(self):
+        """변경분만 저널에 추가 (락은 상태 복사 동안만 보유), 레코드가 쌓이면 스냅샷으로 압축"""
         with self.lock:
-            try:
-                with open("bot_state.json", 'w', encoding='utf-8') as f: json.dump(self.real_bought_coins, f, indent=4)
-                with open("paper_state.json", 'w', encoding='utf-8') as f: json.dump({"coins": self.paper_bought_coins, "balance": self.paper_balance}, f, indent=4)
-                with open("protect_state.json", 'w', encoding='utf-8') as f: json.dump(self.protect_sell_info, f, indent=4)
-            except: pass
+            self.state_seq += 1
+            seq = self.state_seq
+            state = self._state_sections()
+        try:
+            self.journal.record(state, seq)
+            if self.journal.should_compact(): self.journal.compact(state, seq, self._write_snapshot)
+        except Exception as e:
+            print(f"[ERROR] 상태 저장 실패: {e}")
+
+    def close_state(self):
+        """종료 시 대기 중인 변경 저장 후 스냅샷 갱신, 저널 정리"""
+        try: self.persister.stop()
+        except Exception as e: print(f"[ERROR] 상태 저장 실패: {e}")
+        with self.lock:
+            self.state_seq += 1
+            seq = self.state_seq
+            state = self._state_sections()
+        try:
+            self.journal.compact(state, seq, self._write_snapshot)
+            self.journal.close()
+        except Exception as e:
+            print(f"[ERROR] 상태 스냅샷 저장 실패: {e}")
 
     def update_balance(self):
         today = date.today().isoformat()
@@ -1129,7 +1447,8 @@ def wait_order_fill_or_cancel(uuid: str, ticker: str, side: str, max_wait=5):
         bot.log(f"주문 취소 실패({ticker}): {e}", "ERROR")
     return None
 
-def sync_positions_from_exchange():
+def sync_positions_from_exchange(critical=False):
+    """거래소 잔고로 실계좌 포지션 동기화 (critical: 체결 직후 호출 시 즉시 저장)"""
     if bot.mode != "real": return
     try:
         bals = bot.upbit.get_balances()
@@ -1154,7 +1473,7 @@ def sync_positions_from_exchange():
                 "amount": bal
             }
         with bot.lock: bot.real_bought_coins = holdings
-        bot.save_state()
+        bot.save_state(critical=critical)
     except Exception as e: bot.log(f"동기화 오류: {e}", "ERROR")
 
 def monitor_protect_tickers():
@@ -1316,7 +1635,7 @@ def execute_buy(ticker, price, rsi, reason):
                     # CSV 로그 기록
                     bot.log_buy_transaction(ticker, real_price, config.TRADE_AMOUNT, reason, rsi)
                     
-                    sync_positions_from_exchange()
+                    sync_positions_from_exchange(critical=True)
                 else:
                     bot.log(f"매수 미체결 취소됨: {ticker}", "SYSTEM")
             else:
@@ -1386,9 +1705,9 @@ def execute_sell(ticker, price, profit, reason):
                                  bot.protect_sell_info[ticker] = {
                                      "price": real_fill, "time": time.time(), "amount": float(bal)
                                  }
-                                 bot.save_state()
+                            bot.save_state()
 
-                    sync_positions_from_exchange()
+                    sync_positions_from_exchange(critical=True)
                 else: bot.log(f"매도 실패: {res}", "ERROR")
             else:
                 sync_positions_from_exchange()
@@ -1434,7 +1753,7 @@ def sell_all_position(ticker):
                 if res and "uuid" in res:
                     bot.log(f"강제 매도: {ticker}", "SELL")
                     wait_order_fill_or_cancel(res['uuid'], ticker, "SELL")
-                    sync_positions_from_exchange()
+                    sync_positions_from_exchange(critical=True)
                     return {"status":"ok"}
         except: pass
         return {"status":"fail"}
@@ -1473,43 +1792,68 @@ def panic_sell_all():
                         if res and "uuid" in res: wait_order_fill_or_cancel(res["uuid"], ticker, "SELL")
                         safe_sleep(0.2)
                     except: pass
-            sync_positions_from_exchange()
+            sync_positions_from_exchange(critical=True)
         except Exception as e: bot.log(f"비상 탈출 중 오류: {e}", "ERROR")
     else:
         with bot.lock:
             tickers = list(bot.paper_bought_coins.keys())
         for t in tickers: sell_all_position(t)
-        bot.save_state()
+        bot.save_state(critical=True)
+
+# API 핸들러는 메모리 상태만 읽고 바로 반환. 거래소 작업은 commands 큐(전용 워커 스레드)에 넣고 job id 를 돌려준다
+commands = CommandQueue("crypto-commands")
+
+def republish():
+    """상태 스냅샷 재게시를 스레드풀에 넘김 (핸들러가 bot.lock 대기로 이벤트 루프를 막지 않도록)"""
+    asyncio.get_running_loop().run_in_executor(None, bot.publish_status)
+
+def sell_one_job(ticker):
+    res = sell_all_position(ticker)
+    bot.publish_status()
+    return res
+
+def panic_job():
+    panic_sell_all()
+    bot.publish_status()
+    return {"status": "ok"}
 
 @app.post("/api/start")
-def api_start():
+async def api_start():
     bot.is_running = True
     bot.log("봇 시작", "SYSTEM")
+    republish()
     return {"status":"ok"}
 
 @app.post("/api/stop")
-def api_stop():
+async def api_stop():
     bot.is_running = False
     bot.log("봇 정지", "SYSTEM")
+    republish()
     return {"status":"ok"}
 
 @app.post("/api/mode")
-def api_mode(p: ModeChange):
+async def api_mode(p: ModeChange):
     bot.mode = p.mode
     bot.log(f"모드 변경: {p.mode}", "SYSTEM")
+    republish()
     return {"status":"ok"}
 
 @app.post("/api/sell_one")
-def api_sell_one(p: SellOne):
-    return sell_all_position(p.ticker)
+async def api_sell_one(p: SellOne):
+    if p.ticker in bot.protect_tickers: return {"status":"blocked"}
+    return {"status": "queued", "job_id": commands.submit("sell_one", sell_one_job, p.ticker)}
 
 @app.post("/api/panic_sell")
-def api_panic():
-    threading.Thread(target=panic_sell_all).start()
-    return {"status":"ok"}
+async def api_panic():
+    return {"status": "ok", "job_id": commands.submit("panic_sell", panic_job)}
 
-@app.post("/api/config/system")
-def api_update_system(p: SystemConfig):
+@app.get("/api/jobs/{job_id}")
+async def api_job(job_id: str):
+    job = commands.get(job_id)
+    if job is None: raise HTTPException(status_code=404, detail="job not found")
+    return job
+
+def apply_system_config(p):
     with bot.lock:
         bot.black_list = p.black_list
         bot.stop_tickers = p.stop_tickers
@@ -1517,78 +1861,150 @@ def api_update_system(p: SystemConfig):
         bot.max_hold_minutes = p.max_hold_minutes
         bot.save_system_config()
     bot.log("시스템 설정 업데이트 완료", "SYSTEM")
+    bot.publish_status()
+
+@app.post("/api/config/system")
+async def api_update_system(p: SystemConfig):
+    await asyncio.get_running_loop().run_in_executor(None, apply_system_config, p)
     return {"status": "ok"}
 
 @app.get("/api/status")
-def api_status():
-    with bot.lock:
-        is_real = bot.mode == "real"
-        coins = bot.real_bought_coins if is_real else bot.paper_bought_coins
-
-        pos_list = []
-        now_ts = time.time()
-
-        for t, info in coins.items():
-            cur = get_current_price_safe(t) or info.get("buy_price", 0)
-            buy = float(info.get("buy_price", 0) or 0)
-            if buy <= 0 or not cur: continue
-
-            profit_rate = (cur - buy) / buy * 100
-            amt = float(info.get("amount", 0) or 0)
-            buy_time = float(info.get("buy_time", now_ts) or now_ts)
-            held_min = (now_ts - buy_time) / 60
-            high = float(info.get("high_price", buy) or buy)
-            dd_from_high = (cur - high) / high * 100
-            cd_left = max(0, int((bot.sell_cooldown.get(t, 0) or 0) - now_ts))
-
-            pos_list.append({
-                "ticker": t, "buy_price": buy, "cur_price": float(cur), "profit_rate": float(profit_rate),
-                "amount": float(amt), "held_min": float(held_min), "high_price": float(high),
-                "dd_from_high": float(dd_from_high), "cooldown_left_sec": cd_left,
-                "is_protect": (t in bot.protect_tickers),
-            })
-
-        start_bal = bot.day_start_balance_real if is_real else bot.day_start_balance_paper
+async def api_status(request: Request):
+    """
+    엔진이 게시한 직렬화 스냅샷을 그대로 반환 (트레이딩 락/네트워크 사용 안 함).
+    쿼리로 boot 와 보유 중인 섹션 버전(balance, positions, history, config)을 넘기면 버전이 바뀐 섹션만 포함하고,
+    logs=<seq> 를 넘기면 그 이후 로그를 newLogs 로 함께 반환한다. (boot 가 다르면 전체 응답)
+    """
+    q = request.query_params
+    # 첫 게시가 실패했으면 다시 시도하고, 그래도 없으면 전체 스냅샷(없으면 빈 객체)으로 응답
+    if bot.status_parts is None: await asyncio.to_thread(bot.publish_status)
+    if not q or bot.status_parts is None: return Response(content=bot.status_bytes or b"{}", media_type="application/json")
+
+    core, frags, vers = bot.status_parts
+    same_boot = q.get("boot") == bot.boot_id
+    parts = [core]
+    for name in STATUS_SECTIONS:
+        if not same_boot or q.get(name) != str(vers.get(name)): parts.append(frags[name])
+    if "logs" in q:
+        try: since = int(q["logs"]) if same_boot else 0
+        except ValueError: since = 0
+        parts.append(_json_frag("newLogs", bot.logs.delta(since)))
+    return Response(content=b"{" + b",".join(parts) + b"}", media_type="application/json")
+
+@app.get("/api/logs")
+async def api_logs(since: int = 0, boot: Optional[str] = None):
+    """since 이후 로그만 반환 (reset=True 이면 클라이언트는 보관 중인 로그를 버리고 새로 받은 목록으로 교체, boot 가 다르면 재시작으로 보고 reset)"""
+    return bot.logs.delta(since, boot)
+
+@app.get("/api/stream")
+async def api_stream(request: Request):
+    """대시보드 푸시 채널 (SSE): status(변경분), logs(접속 시 전체), log(새 로그), market(감시 종목 테이블), trending(주요 코인 추세)"""
+    def initial():
+        return [("logs", bot.logs.delta())]
+    return StreamingResponse(hub.stream(request, initial), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@app.get("/api/health")
+async def api_health():
+    return {"status": "ok", "warm": bot.warm_event.is_set(), "startup": dict(bot.startup_stats),
+            "subscribers": hub.subscribers, "pending_jobs": commands.pending()}
+
+@app.get("/api/trades/pnl")
+async def api_trades_pnl(group: str = "day", mode: Optional[str] = None, ticker: Optional[str] = None,
+                         reason: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None):
+    """거래 저장소 기준 손익 집계 (group: day / ticker / reason / mode, since/until: YYYY-MM-DD)"""
+    try:
+        return await trade_store.query(trade_store.pnl, group, bot="crypto", mode=mode, ticker=ticker, reason=reason, since=since, until=until)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        return {
-            "isRunning": bot.is_running, "mode": bot.mode,
-            "balance": bot.real_balance if is_real else bot.paper_balance,
-            "start_balance": start_bal, "positions": pos_list,
-            "history": list(bot.balance_history), "logs": list(bot.logs),
-            "config": {
-                "market": bot.market_status, "targetProfit": bot.target_profit, "stopLoss": bot.stop_loss,
-                "rsiThreshold": bot.rsi_threshold, "autoTune": bot.auto_tune,
-                "protectTickers": bot.protect_tickers, "blackList": bot.black_list,
-                "stopTickers": bot.stop_tickers, "maxHoldMinutes": bot.max_hold_minutes
-            }
-        }
+@app.get("/api/trades/winrate")
+async def api_trades_winrate(mode: Optional[str] = None, ticker: Optional[str] = None,
+                             since: Optional[str] = None, until: Optional[str] = None):
+    return await trade_store.query(trade_store.win_rate, bot="crypto", mode=mode, ticker=ticker, since=since, until=until)
 
 @app.get("/api/market")
-def api_market():
-    res = []
-    with bot.lock: targets = bot.target_tickers[:8]
-    for t in targets:
-        rsi, ma, px, pump, ma5, open_p = get_indicators(t)
-        if rsi:
-            risky, why = is_risky_market(t)
-            trend = "급등" if pump else ("상승세" if px>ma else "하락세")
-            res.append({"ticker":t, "rsi":rsi, "trend":trend, "risky":risky, "why":why})
-    return res
+async def api_market():
+    # 엔진 스캔/백그라운드 갱신 결과를 메모리에서 반환 (age_sec: 행 갱신 후 경과 시간)
+    now = time.time()
+    rows = [dict(r) for r in bot.market_view]
+    for r in rows: r["age_sec"] = round(now - r["updated_at"], 1)
+    return rows
+
+def market_refresher():
+    """
+    엔진 실행 중 매수 스캔이 돌지 않을 때(슬롯 없음)에도 감시 종목 테이블이 market_row_ttl 안에 갱신되도록 보충.
+    정지 중에는 조회하지 않으며, 테이블은 마지막 스캔 결과를 age_sec 과 함께 그대로 보여준다
+    """
+    bot.warm_event.wait(timeout=30)
+    while not shutting_down:
+        if not bot.is_running:
+            safe_sleep(5)
+            continue
+        try:
+            now = time.time()
+            with bot.lock:
+                stale = [t for t in bot.target_tickers[:8]
+                         if now - bot.market_rows.get(t, {}).get("updated_at", 0) > bot.market_row_ttl]
+            for t in stale:
+                rsi, ma, px, pump, ma5, open_p = get_indicators(t)
+                if rsi:
+                    risky, why = is_risky_market(t)
+                    bot.record_market_row(t, rsi, ma, px, pump, risky, why)
+                safe_sleep(0.2)
+            bot.publish_market()
+        except Exception as e:
+            print(f"[ERROR] 시장 테이블 갱신 실패: {e}")
+        safe_sleep(5)
 
 @app.get("/api/trending")
-def api_trending():
-    """주요 암호화폐 추세 데이터 반환"""
-    return get_major_crypto_trends()
+async def api_trending():
+    """주요 암호화폐 추세 데이터 반환 (trending_refresher 가 갱신한 값, updated_at: 갱신 시각)"""
+    return bot.trending
+
+def trending_refresher(interval=5, rsi_ttl=60):
+    """
+    주요 코인 추세표를 interval 초마다 갱신 (/v1/ticker 1회).
+    RSI 는 감시 종목 테이블에 최신 값이 있으면 재사용하고, 없으면 종목당 rsi_ttl 초에 한 번만 캔들 조회
+    """
+    indicators = {}  # ticker -> (갱신 시각, rsi, pump)
+    last_fp = None  # 직전에 푸시한 추세표 (updated_at 제외)
+    while not shutting_down:
+        try:
+            now = time.time()
+            with bot.lock: rows = {t: dict(r) for t, r in bot.market_rows.items()}
+            for t, _ in MAJOR_COINS:
+                row = rows.get(t)
+                if row and now - row["updated_at"] < rsi_ttl:
+                    indicators[t] = (row["updated_at"], row["rsi"], row["trend"] == "급등")
+                elif now - indicators.get(t, (0,))[0] >= rsi_ttl:
+                    rsi, ma, px, pump, ma5, open_p = get_indicators(t)
+                    indicators[t] = (now, rsi, bool(pump))
+                    safe_sleep(0.2)
+
+            res = get_major_crypto_trends({t: (v[1], v[2]) for t, v in indicators.items()})
+            if res:
+                fp = json.dumps(res, sort_keys=True)
+                ts = time.time()
+                for r in res: r["updated_at"] = ts
+                bot.trending = res
+                # 내용이 바뀐 경우에만 푸시 (/api/trending 은 매번 갱신 시각 반영)
+                if fp != last_fp:
+                    last_fp = fp
+                    hub.publish("trending", res, snapshot=True)
+        except Exception as e:
+            print(f"[ERROR] 추세 데이터 갱신 실패: {e}")
+        safe_sleep(interval)
+
+# 대시보드: stock_ui_korean.html (없으면 내장 INDEX_HTML), 압축본/ETag 를 미리 계산해 두고 서빙
+index_page = StaticPage("stock_ui_korean.html", fallback=INDEX_HTML)
 
 @app.get("/")
-def index():
-    try:
-        with open("stock_ui_korean.html", "r", encoding="utf-8") as f:
-            return HTMLResponse(f.read())
-    except Exception as e:
-        return HTMLResponse(f"<h1>Error loading UI: {e}</h1>")
+async def index(request: Request):
+    return index_page.response(request)
 
 def trading_loop():
+    # 워밍업(마켓 검증/포지션 정리)이 끝날 때까지 최대 30초 대기
+    bot.warm_event.wait(timeout=30)
     bot.log("시스템 가동", "SYSTEM")
     step = 0
     while True:
@@ -1604,7 +2020,9 @@ def trading_loop():
                 if step % 300 == 0:
                     top = fetch_top_markets_by_trade_price(bot.watch_top_n)
                     if top:
-                        with bot.lock: bot.target_tickers = [t for t in top if t not in bot.black_list and t not in bot.stop_tickers]
+                        with bot.lock:
+                            bot.target_tickers = [t for t in top if t not in bot.black_list and t not in bot.stop_tickers]
+                            bot.market_dirty = True
                         bot.log(f"감시 종목 갱신({len(bot.target_tickers)}개): {', '.join(bot.target_tickers[:5])}...", "SYSTEM")
 
                 with bot.lock: reentry_candidates = list(bot.protect_sell_info.keys())
@@ -1642,6 +2060,7 @@ def trading_loop():
                         if not rsi: continue
 
                         risky, why = is_risky_market(t)
+                        bot.record_market_row(t, rsi, ma, px, pump, risky, why)
                         if risky:
                             if _should_log_risky(t): bot.log(f"스킵(위험): {t} {why}", "INFO")
                             continue
@@ -1721,8 +2140,11 @@ def trading_loop():
                 safe_sleep(5)
 
             step += 1
+            bot.publish_status()
+            bot.publish_market()
             safe_sleep(1)
         else:
+            bot.publish_status()
             safe_sleep(1)
 
 if __name__ == "__main__":
@@ -138,7 +138,7 @@ def isPaperTrading():  # 모의투자 매매
 def changeTREnv(token_key, svr="prod", product=_cfg["my_prod"]):
     cfg = dict()
 
-    global _isPaper
+    global _isPaper, _smartSleep
     if svr == "prod":  # 실전투자
         ak1 = "my_app"  # 실전투자용 앱키
         ak2 = "my_sec"  # 실전투자용 앱시크리트
@@ -256,6 +256,9 @@ def getEnv():
 
 
 def smart_sleep():
+    if _rate_budget is not None:  # 호출 간격은 _url_fetch 에서 RateBudget 으로 제어
+        return
+
     if _DEBUG:
         print(f"[RateLimit] Sleeping {_smartSleep}s ")
 
@@ -266,6 +269,15 @@ def getTREnv():
     return _TRENV
 
 
+_rate_budget = None
+
+
+# REST 호출 속도 제한기 등록 (kis_rate.RateBudget). 등록하면 _url_fetch 가 호출마다 토큰을 받고 smart_sleep 은 대기하지 않음
+def set_rate_budget(budget):
+    global _rate_budget
+    _rate_budget = budget
+
+
 # 주문 API에서 사용할 hash key값을 받아 header에 설정해 주는 함수
 # 현재는 hash key 필수 사항아님, 생략가능, API 호출과정에서 변조 우려를 하는 경우 사용
 # Input: HTTP Header, HTTP post param
@@ -438,6 +450,9 @@ def _url_fetch(
         print(f"<header>\n{headers}")
         print(f"<body>\n{params}")
 
+    if _rate_budget is not None:
+        _rate_budget.acquire()
+
     if postFlag:
         # if (hashFlag): set_order_hash_key(headers, params)
         res = requests.post(url, headers=headers, data=json.dumps(params))
@@ -0,0 +1,113 @@
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+
+# KIS REST 초당 호출 한도(실전 20건, 모의 2건)보다 약간 낮게 설정
+RATE_LIMITS = {"prod": 18.0, "vps": 1.8}
+
+# 우선순위 (작을수록 먼저)
+PRIORITY_EXIT = 0    # 보유 종목 청산 감시/매도
+PRIORITY_NORMAL = 1  # 계좌 동기화, 매수 주문 등
+PRIORITY_SCAN = 2    # 종목 발굴, 매수 후보 평가
+
+# 스레드별 컨텍스트 값 (contextvars.copy_context().run 으로 넘기면 다른 스레드의 작업에도 그대로 적용)
+_priority = contextvars.ContextVar("kis_priority", default=PRIORITY_NORMAL)
+_budget = contextvars.ContextVar("kis_budget", default=None)
+
+
+def current_priority():
+    return _priority.get()
+
+
+@contextmanager
+def request_priority(priority):
+    """with 블록 안에서 현재 스레드가 보내는 KIS 호출의 우선순위 지정"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def bind_budget(budget):
+    """현재 스레드의 KIS 호출을 budget 으로 제한 (엔진 전용 스레드/스레드풀 initializer 에서 호출)"""
+    _budget.set(budget)
+
+
+class RateBudget:
+    """
+    KIS REST 호출 속도 제한기 (토큰 버킷, 초당 rate 건 / 최대 burst 건 연속).
+    대기 중인 호출이 여러 개면 우선순위 -> 도착 순으로 토큰을 받으므로, 스캔 호출이 밀려 있어도 청산 호출이 먼저 나간다.
+    parent 를 주면 자신의 토큰을 받은 뒤 parent 의 토큰도 받는다 (계좌 전체 한도 안에서 엔진별 몫 배분).
+    """
+    def __init__(self, rate, burst=1, parent=None):
+        self.parent = parent
+        self.cond = threading.Condition()
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.waiters = []  # (priority, seq) 힙
+        self.seq = itertools.count()
+        self.calls = 0
+        self.wait_total = 0.0
+
+    def set_rate(self, rate, burst=None):
+        """실전/모의 전환 시 한도 변경"""
+        with self.cond:
+            self._refill()
+            self.rate = float(rate)
+            if burst is not None: self.burst = float(burst)
+            self.tokens = min(self.tokens, self.burst)
+            self.cond.notify_all()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, priority=None):
+        """토큰 1개를 받을 때까지 대기 (priority 생략 시 현재 스레드의 request_priority)"""
+        me = (current_priority() if priority is None else priority, next(self.seq))
+        start = time.monotonic()
+        with self.cond:
+            heapq.heappush(self.waiters, me)
+            try:
+                while True:
+                    self._refill()
+                    if self.waiters[0] == me:
+                        if self.tokens >= 1:
+                            self.tokens -= 1
+                            break
+                        self.cond.wait((1 - self.tokens) / self.rate)
+                    else:
+                        self.cond.wait()
+            finally:
+                self.waiters.remove(me)
+                heapq.heapify(self.waiters)
+                self.cond.notify_all()
+        if self.parent is not None: self.parent.acquire(me[0])
+        with self.cond:
+            self.calls += 1
+            self.wait_total += time.monotonic() - start
+
+    def stats(self):
+        with self.cond:
+            return {"rate": self.rate, "calls": self.calls, "waiting": len(self.waiters),
+                    "avg_wait_ms": round(self.wait_total / self.calls * 1000, 1) if self.calls else 0.0}
+
+
+class BudgetScope:
+    """kis_auth.set_rate_budget() 에 등록하는 진입점: 스레드에 bind_budget() 된 예산이 있으면 그것을, 없으면 기본 예산을 사용"""
+    def __init__(self, default):
+        self.default = default
+
+    def acquire(self, priority=None):
+        (_budget.get() or self.default).acquire(priority)
+
+
+budget = RateBudget(RATE_LIMITS["vps"])  # 계좌(앱키) 전체 한도
+scope = BudgetScope(budget)
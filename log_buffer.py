@@ -0,0 +1,56 @@
+import threading
+import time
+from collections import deque
+
+
+class LogBuffer:
+    """
+    고정 크기 로그 링 버퍼.
+    항목마다 단조 증가하는 seq 를 붙여 보관하고, 가득 차면 가장 오래된 항목이 밀려난다.
+    조회 결과는 기존 self.logs 와 같이 최신순이다.
+    boot 는 버퍼 생성(프로세스 기동) 시각으로, 재시작 후 seq 가 다시 커져도 클라이언트가 이전 커서를 구분할 수 있게 한다.
+    """
+    def __init__(self, capacity=150):
+        self.capacity = capacity
+        self.items = deque(maxlen=capacity)
+        self.lock = threading.Lock()
+        self.seq = 0
+        self.boot = str(int(time.time() * 1000))
+
+    def append(self, entry):
+        """entry(dict) 에 seq 를 붙여 추가하고 seq 반환"""
+        with self.lock:
+            self.seq += 1
+            entry["seq"] = self.seq
+            self.items.append(entry)
+            return self.seq
+
+    def snapshot(self):
+        with self.lock:
+            return list(reversed(self.items))
+
+    def since(self, seq):
+        """seq 이후 항목 (최신순). seq 가 현재보다 크면 (서버 재시작 등) None"""
+        with self.lock:
+            if seq > self.seq: return None
+            out = []
+            for e in reversed(self.items):
+                if e["seq"] <= seq: break
+                out.append(e)
+            return out
+
+    def delta(self, since=0, boot=None):
+        """
+        /api/logs 응답: since 이후 항목. 처음 요청(since=0)이거나 boot 가 다르면(서버 재시작)
+        reset=True 와 함께 전체 목록을 반환하며, 클라이언트는 보관 중인 로그를 버리고 교체한다
+        """
+        logs = self.since(since) if since and (boot is None or boot == self.boot) else None
+        reset = logs is None
+        if reset: logs = self.snapshot()
+        return {"boot": self.boot, "seq": self.seq, "reset": reset, "capacity": self.capacity, "logs": logs}
+
+    def __iter__(self):
+        return iter(self.snapshot())
+
+    def __len__(self):
+        return len(self.items)
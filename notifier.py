@@ -0,0 +1,110 @@
+import atexit
+import threading
+import time
+from collections import deque
+
+import requests
+
+MAX_MESSAGE_LEN = 4096  # 텔레그램 메시지 최대 길이
+
+
+class TelegramNotifier:
+    """
+    텔레그램 비동기 알림 발송기.
+    send() 는 메시지를 큐에 넣기만 하고, 백그라운드 스레드가 min_interval 간격으로 발송한다.
+    발송 대기 중 여러 건이 쌓이면 한 메시지(다이제스트)로 합쳐 보내고,
+    큐가 가득 차면 가장 오래된 메시지를 버린다.
+    """
+    def __init__(self, token, chat_id, max_queue=200, min_interval=1.0, timeout=5):
+        self.token = token
+        self.chat_id = chat_id
+        self.min_interval = min_interval
+        self.timeout = timeout
+        self.q = deque(maxlen=max_queue)
+        self.retry = None  # 429 로 보류된 다이제스트 (큐와 별도로 보관해 새 메시지를 밀어내지 않음)
+        self.cond = threading.Condition()
+        self.thread = None
+        self.stopped = False
+        self.last_sent = 0.0
+        self.dropped = 0
+        self.sent = 0
+        self.failed = 0
+        self.session = requests.Session()
+
+    @property
+    def enabled(self):
+        return bool(self.token and self.chat_id)
+
+    def send(self, msg):
+        """메시지를 발송 큐에 추가 (블로킹 없음)"""
+        if not self.enabled or self.stopped: return
+        with self.cond:
+            if len(self.q) == self.q.maxlen: self.dropped += 1
+            self.q.append(str(msg))
+            self.cond.notify()
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="telegram-notifier", daemon=True)
+                self.thread.start()
+                atexit.register(self.close)
+
+    def _take_batch(self):
+        """큐 앞에서부터 MAX_MESSAGE_LEN 안에 들어가는 만큼 꺼내 한 메시지로 합침"""
+        if self.retry is not None:
+            text, self.retry = self.retry, None
+            return text
+        lines, size = [], 0
+        if self.dropped:
+            lines.append(f"(알림 {self.dropped}건 누락)")
+            size = len(lines[0]) + 1
+            self.dropped = 0
+        while self.q:
+            msg = self.q[0][:MAX_MESSAGE_LEN - 64]
+            if lines and size + len(msg) + 1 > MAX_MESSAGE_LEN: break
+            lines.append(msg)
+            size += len(msg) + 1
+            self.q.popleft()
+        return "\n".join(lines)
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.q and self.retry is None and not self.stopped: self.cond.wait()
+                if not self.q and self.retry is None and self.stopped: return
+                # 발송 간격 제한 (대기하는 동안 들어온 메시지는 다음 다이제스트에 합쳐짐)
+                wait = self.last_sent + self.min_interval - time.time()
+                while wait > 0 and not self.stopped:
+                    self.cond.wait(wait)
+                    wait = self.last_sent + self.min_interval - time.time()
+                text = self._take_batch()
+            self._post(text)
+
+    def _post(self, text):
+        self.last_sent = time.time()
+        try:
+            r = self.session.post(f"https://api.telegram.org/bot{self.token}/sendMessage",
+                                  data={"chat_id": self.chat_id, "text": text}, timeout=self.timeout)
+            if r.status_code == 429:
+                # 텔레그램이 지정한 시간만큼 발송 보류
+                retry = r.json().get("parameters", {}).get("retry_after", 5)
+                self.last_sent = time.time() + float(retry) - self.min_interval
+                with self.cond: self.retry = text
+                return
+            try: body = r.json()
+            except ValueError: body = {}
+            if r.ok and body.get("ok", True):
+                self.sent += 1
+            else:
+                # 잘못된 chat_id(400), 차단(403) 등: 재시도해도 실패하므로 기록만 남김
+                self.failed += 1
+                print(f"[ERROR] 텔레그램 발송 실패: HTTP {r.status_code} {body.get('description', '')}")
+        except Exception as e:
+            self.failed += 1
+            print(f"[ERROR] 텔레그램 발송 실패: {type(e).__name__}")  # 예외 메시지에 토큰 URL 이 포함되므로 출력하지 않음
+
+    def close(self, timeout=5):
+        """종료 시 호출: 남은 메시지를 최대 timeout 초 동안 발송"""
+        with self.cond:
+            self.stopped = True
+            self.cond.notify_all()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=timeout)
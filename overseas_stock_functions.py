@@ -1,6 +1,10 @@
+import contextvars
 import logging
 import sys
-from typing import Optional, Tuple
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
 
 import pandas as pd
 
@@ -76,6 +80,151 @@ def price(
         return pd.DataFrame()
 
 
+# price_many 캐시/스레드풀
+PRICE_COLUMNS = ["last", "base", "diff", "rate", "tvol", "tamt"]
+_price_cache = {}  # (excd, symb) -> (조회 시각, {컬럼: 값})
+_price_cache_lock = threading.Lock()
+_price_pool = None
+
+
+def _price_row(excd, symb, env_dv):
+    df = price(excd=excd, symb=symb, env_dv=env_dv)
+    if df is None or df.empty or "last" not in df.columns: return None
+    row = df.iloc[0]
+    values = {}
+    for col in PRICE_COLUMNS:
+        try: values[col] = float(row.get(col, "") or "nan")
+        except (TypeError, ValueError): values[col] = float("nan")
+    if not values["last"] > 0: return None  # 장 시작 전/거래정지 등으로 현재가 없음
+    return values
+
+
+def price_many(
+        pairs: List[Tuple[str, str]],  # [(거래소코드, 종목코드)]
+        env_dv: str = "real",  # 실전모의구분
+        max_age: float = 1.0,  # 캐시 유효 시간(초)
+        executor: Optional[ThreadPoolExecutor] = None,  # 조회에 쓸 스레드풀 (생략 시 모듈 공용 풀)
+) -> pd.DataFrame:
+    """
+    [해외주식] 기본시세
+    해외주식 현재체결가[v1_해외주식-009] 여러 종목 동시 조회.
+    max_age 초 안에 조회한 종목은 캐시에서 돌려주고, 나머지만 스레드풀에서 병렬로 price() 를 호출합니다.
+    호출 속도는 kis_auth.set_rate_budget() 에 등록된 예산이 제한하며, 호출한 스레드의 우선순위/예산이 그대로 적용됩니다.
+
+    Returns:
+        pd.DataFrame: 입력 순서(중복 제거)대로 excd, symb, last, base, diff, rate, tvol, tamt, fetched_at 컬럼.
+                      조회 실패 종목은 last 가 NaN
+
+    Example:
+        >>> df = price_many([("NAS", "AAPL"), ("NAS", "TSLA")])
+    """
+    global _price_pool
+    keys = list(dict.fromkeys((excd, symb) for excd, symb in pairs))
+    now = time.time()
+    with _price_cache_lock:
+        cached = {k: v for k in keys if (v := _price_cache.get(k)) and now - v[0] < max_age}
+    missing = [k for k in keys if k not in cached]
+
+    if missing:
+        if executor is None:
+            with _price_cache_lock:
+                if _price_pool is None: _price_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="ovs-price")
+            executor = _price_pool
+        # 작업마다 호출 스레드의 컨텍스트(요청 우선순위/예산)를 복사해 실행
+        futures = {k: executor.submit(contextvars.copy_context().run, _price_row, k[0], k[1], env_dv) for k in missing}
+        for k, fut in futures.items():
+            try: values = fut.result()
+            except Exception as e:
+                logger.error("Price fetch failed for %s: %s", k[1], e)
+                values = None
+            if values is None: continue
+            cached[k] = (time.time(), values)
+        with _price_cache_lock:
+            _price_cache.update((k, cached[k]) for k in missing if k in cached)
+            if len(_price_cache) > 2000:
+                for k in [k for k, v in _price_cache.items() if now - v[0] >= max_age]: del _price_cache[k]
+
+    nan = float("nan")
+    data = {"excd": [k[0] for k in keys], "symb": [k[1] for k in keys]}
+    for col in PRICE_COLUMNS:
+        data[col] = [cached[k][1][col] if k in cached else nan for k in keys]
+    data["fetched_at"] = [cached[k][0] if k in cached else nan for k in keys]
+    return pd.DataFrame(data)
+
+
+##############################################################################################
+# [해외주식] 기본시세 > 해외주식 기간별시세 [v1_해외주식-010]
+##############################################################################################
+
+def dailyprice(
+        auth: str = "",  # 사용자권한정보
+        excd: str = "",  # 거래소코드
+        symb: str = "",  # 종목코드
+        gubn: str = "0",  # 일/주/월구분
+        bymd: str = "",  # 조회기준일자
+        modp: str = "1",  # 수정주가반영여부
+        env_dv: str = "real",  # 실전모의구분
+) -> Optional[pd.DataFrame]:
+    """
+    [해외주식] 기본시세
+    해외주식 기간별시세[v1_해외주식-010]
+    해외주식 일/주/월봉을 최근 순으로 최대 100건 조회합니다.
+
+    Args:
+        auth (str): 사용자권한정보 (공백 가능)
+        excd (str): 거래소코드 (예: "NAS" - 나스닥, "NYS" - 뉴욕, "AMS" - 아멕스)
+        symb (str): 종목코드 (예: "AAPL", "TSLA")
+        gubn (str): 일/주/월구분 (0:일, 1:주, 2:월)
+        bymd (str): 조회기준일자 YYYYMMDD (공백: 오늘)
+        modp (str): 수정주가반영여부 (0:미반영, 1:반영)
+        env_dv (str): 실전모의구분 (real:실전, demo:모의)
+
+    Returns:
+        Optional[pd.DataFrame]: 기간별시세 데이터 (output2: xymd, clos, open, high, low, tvol 등)
+
+    Example:
+        >>> df = dailyprice(excd="NAS", symb="AAPL")
+        >>> print(df)
+    """
+    if not excd:
+        logger.error("excd is required. (e.g. 'NAS')")
+        raise ValueError("excd is required. (e.g. 'NAS')")
+
+    if not symb:
+        logger.error("symb is required. (e.g. 'AAPL')")
+        raise ValueError("symb is required. (e.g. 'AAPL')")
+
+    # TR ID는 실전/모의 공통
+    tr_id = "HHDFS76240000"
+    api_url = "/uapi/overseas-price/v1/quotations/dailyprice"
+
+    params = {
+        "AUTH": auth,
+        "EXCD": excd,
+        "SYMB": symb,
+        "GUBN": gubn,
+        "BYMD": bymd,
+        "MODP": modp,
+    }
+
+    res = ka._url_fetch(api_url, tr_id, "", params)
+
+    if res.isOK():
+        if hasattr(res.getBody(), 'output2'):
+            output_data = res.getBody().output2
+            if not isinstance(output_data, list):
+                output_data = [output_data]
+            dataframe = pd.DataFrame(output_data)
+            logger.info("Daily price data fetch complete for %s", symb)
+            return dataframe
+        else:
+            return pd.DataFrame()
+    else:
+        logger.error("API call failed: %s - %s", res.getErrorCode(), res.getErrorMessage())
+        res.printError(api_url)
+        return pd.DataFrame()
+
+
 ##############################################################################################
 # [해외주식] 주문/계좌 > 해외주식 잔고 [v1_해외주식-006]
 ##############################################################################################
@@ -405,3 +554,33 @@ def inquire_ccnl(
         logger.error("API call failed: %s - %s", res.getErrorCode(), res.getErrorMessage())
         res.printError(api_url)
         return pd.DataFrame()
+
+
+##############################################################################################
+# [해외주식] 실시간시세 > 해외주식 실시간지연체결가 [실시간-007]
+##############################################################################################
+
+def delayed_ccnl(
+        tr_type: str,  # 등록/해제 ("1": 등록, "2": 해제)
+        tr_key: str,  # D + 시세용 거래소코드 + 종목코드 (예: DNASAAPL)
+) -> Tuple[dict, list]:
+    """
+    [해외주식] 실시간시세
+    해외주식 실시간지연체결가 웹소켓 구독 요청 메시지와 수신 데이터 컬럼 목록을 반환합니다.
+    미국 주식은 무료시세(0분 지연)로 제공됩니다. kis_auth.KISWebSocket.subscribe / send 에 request 로 넘겨 사용합니다.
+    """
+    if tr_type == "":
+        raise ValueError("tr_type is required")
+    if tr_key == "":
+        raise ValueError("tr_key is required")
+
+    tr_id = "HDFSCNT0"
+    msg = ka.data_fetch(tr_id, tr_type, {"tr_key": tr_key})
+
+    columns = [
+        "RSYM", "SYMB", "ZDIV", "TYMD", "XYMD", "XHMS", "KYMD", "KHMS", "OPEN", "HIGH", "LOW", "LAST",
+        "SIGN", "DIFF", "RATE", "PBID", "PASK", "VBID", "VASK", "EVOL", "TVOL", "TAMT", "BIVL", "ASVL",
+        "STRN", "MTYP",
+    ]
+
+    return msg, columns
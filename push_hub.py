@@ -0,0 +1,77 @@
+import asyncio
+import json
+import threading
+
+
+def encode_event(event, data):
+    """SSE 메시지 1건을 바이트로 직렬화 (data 가 bytes 면 이미 직렬화된 JSON 으로 간주)"""
+    if not isinstance(data, (bytes, bytearray)):
+        data = json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+    return b"event: " + event.encode() + b"\ndata: " + bytes(data) + b"\n\n"
+
+
+class EventHub:
+    """
+    대시보드 푸시(SSE) 브로드캐스터.
+    publish() 는 트레이딩 스레드 등 어느 스레드에서든 호출할 수 있고, 메시지는 한 번만 직렬화해 모든 구독자 큐에 넣는다.
+    set_snapshot() 으로 등록한 이벤트는 새 구독자가 접속하면 먼저 전송된다 (이후에는 변경분만 전송).
+    느린 구독자는 큐가 가득 차면 오래된 메시지부터 버린다.
+    """
+    def __init__(self, max_queue=200, ping_interval=15):
+        self.max_queue = max_queue
+        self.ping_interval = ping_interval
+        self.lock = threading.Lock()
+        self.subs = set()
+        self.snapshots = {}
+
+    @property
+    def subscribers(self):
+        return len(self.subs)
+
+    def set_snapshot(self, event, data):
+        msg = encode_event(event, data)
+        with self.lock: self.snapshots[event] = msg
+        return msg
+
+    def publish(self, event, data, snapshot=False):
+        """이벤트 브로드캐스트 (snapshot=True 면 새 구독자용 최신 값으로도 보관)"""
+        msg = self.set_snapshot(event, data) if snapshot else encode_event(event, data)
+        with self.lock: subs = list(self.subs)
+        for loop, q in subs:
+            try: loop.call_soon_threadsafe(_put_drop_oldest, q, msg)
+            except RuntimeError: pass  # 이벤트 루프 종료됨
+        return len(subs)
+
+    async def stream(self, request=None, initial=()):
+        """
+        구독자 1명분 SSE 스트림 (StreamingResponse 에 넘겨 사용).
+        initial 은 접속 직후 보낼 (event, data) 목록 또는 그 목록을 반환하는 함수 (구독 등록 후 호출되므로 사이에 발생한 이벤트를 놓치지 않음)
+        """
+        loop = asyncio.get_running_loop()
+        q = asyncio.Queue(maxsize=self.max_queue)
+        sub = (loop, q)
+        with self.lock:
+            self.subs.add(sub)
+            first = list(self.snapshots.values())
+        try:
+            yield b"retry: 3000\n\n"
+            for msg in first: yield msg
+            for event, data in (initial() if callable(initial) else initial): yield encode_event(event, data)
+            while True:
+                try:
+                    yield await asyncio.wait_for(q.get(), timeout=self.ping_interval)
+                except asyncio.TimeoutError:
+                    if request is not None and await request.is_disconnected(): break
+                    yield b": ping\n\n"
+        finally:
+            with self.lock: self.subs.discard(sub)
+
+
+def _put_drop_oldest(q, msg):
+    if q.full():
+        try: q.get_nowait()
+        except asyncio.QueueEmpty: pass
+    q.put_nowait(msg)
+
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
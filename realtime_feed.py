@@ -0,0 +1,153 @@
+import asyncio
+import queue
+import threading
+import time
+
+import kis_auth as ka
+from domestic_stock_functions import ccnl_krx
+from overseas_stock_functions import delayed_ccnl
+
+MAX_SUBSCRIPTIONS = 40  # KIS 웹소켓 세션당 실시간 등록 한도
+
+# tr_id -> (시장, 종목코드 컬럼, 현재가 컬럼, 당일 고가 컬럼)
+TICK_FIELDS = {
+    "H0STCNT0": ("domestic", "MKSC_SHRN_ISCD", "STCK_PRPR", "STCK_HGPR"),
+    "HDFSCNT0": ("overseas", "SYMB", "LAST", "HIGH"),
+}
+
+
+class RealtimeFeed:
+    """
+    KIS 실시간 체결가 구독기 (국내 H0STCNT0 / 해외 HDFSCNT0).
+    kis_auth.KISWebSocket 을 전용 스레드(자체 asyncio 루프)에서 실행하고, 체결을 받을 때마다
+    (market, code, price, high, ts) 틱을 시장별 thread-safe 큐(ticks[market])에 넣는다. 큐가 가득 차면 오래된 틱부터 버린다.
+    구독 종목은 시장별로 set_codes() 로 바꾸며, 연결 중이면 웹소켓 루프에서 바로 등록/해제하고 재접속 시에는 현재 목록으로 다시 구독한다.
+    웹소켓 세션(접속키)은 하나이므로 국내/해외 엔진이 함께 쓸 때는 한 인스턴스를 공유한다.
+    """
+    def __init__(self, max_queue=10000, api_url="/tryitout", retry_delay=5):
+        self.ticks = {market: queue.Queue(maxsize=max_queue) for market, *_ in TICK_FIELDS.values()}
+        self.api_url = api_url
+        self.retry_delay = retry_delay
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.svr = "prod"
+        self.by_market = {}  # market -> {tr_key: (request, kwargs)}
+        self.wanted = {}  # 전체 구독 목록 tr_key -> (request, kwargs)
+        self.subscribed = {}  # 웹소켓 스레드 전용
+        self.client = None
+        self.ws = None
+        self.loop = None
+        self.sync_lock = None
+        self.thread = None
+        self.last_msg = 0.0
+        self.dropped = 0
+
+    def set_codes(self, market, codes, exchange="NAS", env_dv="real"):
+        """
+        market 의 구독 종목 교체 (다른 시장 구독은 유지). 앞쪽 종목 우선이며, 전체 MAX_SUBSCRIPTIONS 개를
+        구독 중인 시장 수로 나눠 시장별로 배분한다. 처음 호출 시 스레드 시작
+        """
+        if market == "domestic":
+            entries = {c: (ccnl_krx, {"env_dv": env_dv}) for c in codes}
+        else:
+            entries = {f"D{exchange}{c}": (delayed_ccnl, None) for c in codes}
+        with self.lock:
+            self.by_market[market] = entries
+            per_market = MAX_SUBSCRIPTIONS // max(1, sum(1 for e in self.by_market.values() if e))
+            wanted = {}
+            for e in self.by_market.values(): wanted.update(list(e.items())[:per_market])
+            if wanted.keys() == self.wanted.keys(): return
+            self.wanted = wanted
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="kis-realtime", daemon=True)
+                self.thread.start()
+        self.wake.set()
+        self._schedule_sync()
+
+    def configure(self, svr):
+        """실전/모의 서버 변경 시 접속키를 다시 받아 재접속"""
+        if svr == self.svr: return
+        self.svr = svr
+        client, ws, loop = self.client, self.ws, self.loop
+        if client is None or ws is None or loop is None: return
+        client.retry_count = client.max_retries  # KISWebSocket 내부 재접속 루프 종료 -> _run 에서 재인증 후 재접속
+        try: loop.call_soon_threadsafe(lambda: asyncio.ensure_future(ws.close()))
+        except RuntimeError: pass
+
+    def is_live(self, max_silence=60):
+        """연결 중이고 최근 max_silence 초 안에 메시지(체결/PINGPONG)를 받았는지"""
+        return self.ws is not None and time.time() - self.last_msg < max_silence
+
+    def is_subscribed(self, market, code, exchange="NAS"):
+        key = code if market == "domestic" else f"D{exchange}{code}"
+        return key in self.subscribed
+
+    def _run(self):
+        while True:
+            while not self.wanted: self.wake.wait(); self.wake.clear()
+            try:
+                ka.auth_ws(svr=self.svr)
+                with self.lock: self.subscribed = dict(self.wanted)
+                self._write_open_map()
+                self.client = ka.KISWebSocket(api_url=self.api_url)
+                self.client.start(on_result=self._on_result, result_all_data=True)
+            except Exception as e:
+                print(f"[ERROR] 실시간 시세 연결 오류: {e}")
+            self.ws = self.loop = self.client = None
+            time.sleep(self.retry_delay)
+
+    def _write_open_map(self):
+        """재접속 시 KISWebSocket 이 다시 구독할 목록(open_map)을 현재 구독 상태로 맞춤"""
+        ka.open_map.clear()
+        for tr_key, (request, kwargs) in self.subscribed.items():
+            ka.KISWebSocket.subscribe(request, tr_key, kwargs)
+
+    def _on_result(self, ws, tr_id, df, dm):
+        self.last_msg = time.time()
+        if ws is not self.ws:
+            # 새 연결: 이후 구독 변경을 이 루프에서 처리
+            self.ws, self.loop, self.sync_lock = ws, asyncio.get_running_loop(), asyncio.Lock()
+            asyncio.ensure_future(self._sync(ws))
+
+        fields = TICK_FIELDS.get(tr_id)
+        if fields is None or df.empty: return
+        market, code_col, price_col, high_col = fields
+        try:
+            for code, price, high in df[[code_col, price_col, high_col]].itertuples(index=False):
+                self._put((market, str(code), float(price), float(high), self.last_msg))
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"[ERROR] 실시간 체결 파싱 실패({tr_id}): {e}")
+
+    def _put(self, tick):
+        q = self.ticks[tick[0]]
+        try: q.put_nowait(tick)
+        except queue.Full:
+            try: q.get_nowait()
+            except queue.Empty: pass
+            self.dropped += 1
+            q.put_nowait(tick)
+
+    def _schedule_sync(self):
+        ws, loop = self.ws, self.loop
+        if ws is None or loop is None: return
+        try: loop.call_soon_threadsafe(lambda: asyncio.ensure_future(self._sync(ws)))
+        except RuntimeError: pass  # 이벤트 루프 종료됨 (재접속 시 반영)
+
+    async def _sync(self, ws):
+        """wanted 와 현재 구독 상태의 차이만 해제/등록 (해제 먼저 -> 등록 한도 유지)"""
+        async with self.sync_lock:
+            if ws is not self.ws: return
+            with self.lock: wanted = dict(self.wanted)
+            try:
+                for tr_key in [k for k in self.subscribed if k not in wanted]:
+                    request, kwargs = self.subscribed[tr_key]
+                    await ka.KISWebSocket.send(ws, request, "2", tr_key, kwargs)
+                    del self.subscribed[tr_key]
+                for tr_key, (request, kwargs) in wanted.items():
+                    if tr_key in self.subscribed: continue
+                    await ka.KISWebSocket.send(ws, request, "1", tr_key, kwargs)
+                    self.subscribed[tr_key] = (request, kwargs)
+            except Exception as e:
+                print(f"[ERROR] 실시간 구독 변경 실패: {e}")
+            finally:
+                self._write_open_map()
@@ -0,0 +1,212 @@
+import json
+import os
+import threading
+import time
+
+
+def atomic_write_json(path, data, indent=4):
+    """임시 파일에 기록 후 rename 으로 교체 (쓰기 도중 크래시 시 기존 파일 보존)"""
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class StateJournal:
+    """
+    포지션 상태 변경분을 append-only 로그로 기록하는 저널.
+    state 는 {섹션: {키: 값}} 형태이며, 직전에 기록한 상태와 비교해 바뀐 키만 한 줄씩 추가한다.
+    기동 시 스냅샷을 읽은 뒤 replay() 로 저널을 재적용하고, 레코드가 쌓이면 compact() 로 스냅샷을 갱신하고 저널을 비운다.
+    seq 는 호출자가 상태를 복사한 순서이며, 더 최신 상태가 이미 기록됐다면 오래된 복사본은 무시한다.
+    """
+    def __init__(self, path, fsync_interval=1.0, compact_every=500):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+        self.lock = threading.Lock()
+        self.shadow = {}
+        self.last_seq = 0
+        self.records = 0
+        self.last_fsync = 0.0
+        self.sync_timer = None  # 미뤄진 fsync 를 처리할 타이머
+        self.f = None
+
+    def replay(self, state):
+        """
+        저널 레코드를 state 에 재적용.
+        기록 중 잘린 줄에서 멈추고, 이후 append 가 조각 뒤에 이어 붙지 않도록 파일을 마지막 정상 레코드까지로 자른다
+        """
+        if not os.path.exists(self.path): return 0
+        n, good, newline = 0, 0, True
+        with open(self.path, 'rb') as f:
+            for line in f:
+                try: rec = json.loads(line)
+                except ValueError: break
+                sec = state.setdefault(rec["s"], {})
+                if rec.get("d"): sec.pop(rec["k"], None)
+                else: sec[rec["k"]] = rec["v"]
+                n += 1
+                good += len(line)
+                newline = line.endswith(b"\n")
+            size = f.seek(0, os.SEEK_END)
+        if good < size or not newline:
+            with open(self.path, 'r+b') as f:
+                f.truncate(good)
+                if not newline:  # 줄바꿈 직전에 끊긴 정상 레코드
+                    f.seek(good)
+                    f.write(b"\n")
+                f.flush()
+                os.fsync(f.fileno())
+            if good < size: print(f"[WARN] 상태 저널 손상 구간 제거: {size - good} bytes")
+        self.records = n
+        return n
+
+    def reset(self, state, seq=0):
+        """state 를 기준 상태로 지정 (이후 record() 는 이 상태와의 차이만 기록)"""
+        with self.lock:
+            self.shadow = _copy_state(state)
+            self.last_seq = seq
+
+    def record(self, state, seq):
+        """기준 상태 대비 변경/삭제된 키를 저널에 추가하고 추가한 레코드 수를 반환"""
+        with self.lock:
+            if seq < self.last_seq: return 0
+            self.last_seq = seq
+
+            lines = []
+            for s, sec in state.items():
+                prev = self.shadow.setdefault(s, {})
+                for k, v in sec.items():
+                    if k not in prev or prev[k] != v:
+                        lines.append(json.dumps({"s": s, "k": k, "v": v}, separators=(",", ":")))
+                        prev[k] = _copy(v)
+                for k in [k for k in prev if k not in sec]:
+                    lines.append(json.dumps({"s": s, "k": k, "d": 1}, separators=(",", ":")))
+                    del prev[k]
+            if not lines: return 0
+
+            if self.f is None: self.f = open(self.path, 'a', encoding='utf-8')
+            self.f.write("\n".join(lines) + "\n")
+            self.f.flush()
+            self.records += len(lines)
+
+            # fsync 는 fsync_interval 마다 한 번으로 묶음 (미룬 경우 이후 기록이 없어도 타이머로 fsync)
+            now = time.time()
+            if now - self.last_fsync >= self.fsync_interval:
+                os.fsync(self.f.fileno())
+                self.last_fsync = now
+            elif self.sync_timer is None:
+                self.sync_timer = threading.Timer(self.last_fsync + self.fsync_interval - now, self.sync)
+                self.sync_timer.daemon = True
+                self.sync_timer.start()
+            return len(lines)
+
+    def sync(self):
+        """마지막 fsync 이후 기록된 내용을 디스크에 반영"""
+        with self.lock:
+            self.sync_timer = None
+            if self.f is None: return
+            os.fsync(self.f.fileno())
+            self.last_fsync = time.time()
+
+    def should_compact(self):
+        return self.records >= self.compact_every
+
+    def compact(self, state, seq, write_snapshot):
+        """write_snapshot(state) 로 스냅샷을 저장하고 저널을 비움 (state 가 최신이 아니면 건너뜀)"""
+        with self.lock:
+            if seq < self.last_seq: return False
+            write_snapshot(state)
+            if self.f is not None:
+                self.f.close()
+                self.f = None
+            with open(self.path, 'w', encoding='utf-8') as f:
+                os.fsync(f.fileno())
+            self.shadow = _copy_state(state)
+            self.last_seq = seq
+            self.records = 0
+            return True
+
+    def close(self):
+        with self.lock:
+            if self.sync_timer is not None:
+                self.sync_timer.cancel()
+                self.sync_timer = None
+            if self.f is not None:
+                self.f.flush()
+                os.fsync(self.f.fileno())
+                self.f.close()
+                self.f = None
+
+
+def _copy(v):
+    return dict(v) if isinstance(v, dict) else v
+
+def _copy_state(state):
+    return {s: {k: _copy(v) for k, v in sec.items()} for s, sec in state.items()}
+
+
+class DebouncedPersister:
+    """
+    상태 저장 요청을 모아서 처리하는 백그라운드 저장 서비스.
+    mark_dirty() 는 표시만 하고, 백그라운드 스레드가 첫 표시 후 interval 초 뒤에 한 번 write_fn() 을 호출한다.
+    (interval 안에 들어온 요청은 한 번의 저장으로 합쳐짐) 즉시 저장이 필요하면 flush() 를 호출한다.
+    """
+    def __init__(self, write_fn, interval=2.0, name="state-persister"):
+        self.write_fn = write_fn
+        self.name = name
+        self.interval = interval
+        self.cond = threading.Condition()
+        self.dirty = False
+        self.dirty_since = 0.0
+        self.stopped = False
+        self.thread = None
+        self.requests = 0
+        self.writes = 0
+
+    def mark_dirty(self):
+        with self.cond:
+            self.requests += 1
+            if not self.dirty:
+                self.dirty = True
+                self.dirty_since = time.time()
+                self.cond.notify()
+            if self.thread is None and not self.stopped:
+                self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self.thread.start()
+
+    def flush(self):
+        """
+        표시된 변경이 있으면 즉시 저장.
+        write_fn 은 동시에 호출될 수 있으므로 자체적으로 순서를 보장해야 한다 (StateJournal 의 seq).
+        """
+        with self.cond:
+            if not self.dirty: return False
+            self.dirty = False
+            self.writes += 1
+        self.write_fn()
+        return True
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.dirty and not self.stopped: self.cond.wait()
+                if self.stopped: return
+                # 첫 변경 후 interval 동안 추가 변경을 모음 (stop 시 즉시 깨어남)
+                wait = self.dirty_since + self.interval - time.time()
+                while wait > 0 and not self.stopped:
+                    self.cond.wait(wait)
+                    wait = self.dirty_since + self.interval - time.time()
+            try: self.flush()
+            except Exception as e: print(f"[ERROR] 상태 저장 실패: {e}")
+
+    def stop(self):
+        """백그라운드 스레드 정지 후 남은 변경 저장"""
+        with self.cond:
+            self.stopped = True
+            self.cond.notify_all()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=5)
+        self.flush()
@@ -0,0 +1,74 @@
+import gzip
+import hashlib
+import os
+import threading
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+
+class StaticPage:
+    """
+    대시보드 HTML 을 메모리에 올려두고 압축본(gzip, brotli 설치 시 br)과 인코딩별 강한 ETag 를 미리 계산해 서빙.
+    선택된 인코딩의 ETag 가 If-None-Match 와 일치하면 본문 없이 304 를 반환한다.
+    path 가 있으면 파일 수정 시각이 바뀔 때만 다시 읽고, 파일이 없으면 fallback 문자열을 사용한다.
+    """
+    def __init__(self, path=None, fallback="", media_type="text/html; charset=utf-8"):
+        self.path = path
+        self.fallback = fallback
+        self.media_type = media_type
+        self.lock = threading.Lock()
+        self.mtime = None
+        self.bodies = {}
+        self.etags = {}
+        self.load()
+
+    def load(self):
+        text, mtime = self.fallback, None
+        if self.path:
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+                with open(self.path, "r", encoding="utf-8") as f:
+                    text = f.read()
+            except OSError as e:
+                print(f"[WARN] {self.path} 읽기 실패, 내장 페이지 사용: {e}")
+                mtime = None
+        raw = text.encode("utf-8")
+        bodies = {"identity": raw, "gzip": gzip.compress(raw, compresslevel=9, mtime=0)}
+        if HAS_BROTLI: bodies["br"] = brotli.compress(raw, quality=11)
+        with self.lock:
+            self.bodies = bodies
+            digest = hashlib.sha256(raw).hexdigest()[:32]
+            self.etags = {enc: f'"{digest}"' if enc == "identity" else f'"{digest}-{enc}"' for enc in bodies}
+            self.mtime = mtime
+
+    def _check_reload(self):
+        if not self.path: return
+        try: mtime = os.stat(self.path).st_mtime_ns
+        except OSError: mtime = None
+        if mtime != self.mtime: self.load()
+
+    def _encoding(self, accept):
+        accept = accept.lower()
+        if "br" in self.bodies and "br" in accept: return "br"
+        if "gzip" in accept: return "gzip"
+        return "identity"
+
+    def response(self, request: Request):
+        self._check_reload()
+        with self.lock: bodies, etags = self.bodies, self.etags
+        enc = self._encoding(request.headers.get("accept-encoding", ""))
+        headers = {"ETag": etags[enc], "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+
+        inm = request.headers.get("if-none-match", "")
+        if inm and (inm.strip() == "*" or etags[enc] in [t.strip().removeprefix("W/") for t in inm.split(",")]):
+            return Response(status_code=304, headers=headers)
+
+        if enc != "identity": headers["Content-Encoding"] = enc
+        return Response(content=bodies[enc], media_type=self.media_type, headers=headers)
@@ -15,3 +15,7 @@ STOCK_NAMES = {
 
 def get_stock_name(code):
     return STOCK_NAMES.get(code, code)
+
+def register_stock_names(names):
+    """순위 조회 등에서 받은 종목명 추가 (code -> name)"""
+    STOCK_NAMES.update({c: n for c, n in names.items() if n and n != c})
@@ -2,19 +2,34 @@ import sys
 import os
 import time
 import json
+import queue
 import logging
 import requests
 import datetime
 import threading
-import csv
 from pathlib import Path
-from fastapi import FastAPI
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, astuple
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse, Response
 from pydantic import BaseModel
 import uvicorn
 import pandas as pd
-import numpy as np
+from typing import Optional
+from trade_journal import journal as trade_journal
+from trade_store import store as trade_store
+from candle_archive import archive as candle_archive
+from notifier import TelegramNotifier
+from log_buffer import LogBuffer
+from push_hub import EventHub, SSE_HEADERS
+from static_assets import StaticPage
+from command_queue import CommandQueue
+from trading_calendar import SESSIONS, TradingCalendar
+import fast_json
+from kis_rate import budget as rate_budget, scope as rate_scope, bind_budget, request_priority
+from kis_rate import RATE_LIMITS, PRIORITY_EXIT, PRIORITY_SCAN
 
 # -----------------------------------------------------------------------------
 # 1. HTML UI Content (Load from external file)
@@ -129,6 +144,26 @@ except FileNotFoundError:
     <script type="text/babel">
         const { useState, useEffect } = React;
 
+        // 로그는 /api/logs?since= 로 새 항목만 받아 누적
+        const logCache = { boot: '', seq: 0, list: [], capacity: 100 };
+        const applyLogs = (r) => {
+            // 서버가 재시작됐으면(boot 변경) seq 가 이어지지 않으므로 보관 중인 로그를 버림
+            const reset = r.reset || (r.boot !== undefined && r.boot !== logCache.boot);
+            const fresh = reset ? r.logs : r.logs.filter(l => l.seq > logCache.seq);
+            logCache.list = (reset ? fresh : [...fresh, ...logCache.list]).slice(0, r.capacity);
+            logCache.seq = Math.max(reset ? 0 : logCache.seq, r.seq);
+            logCache.boot = r.boot;
+            logCache.capacity = r.capacity;
+            return logCache.list;
+        };
+        const pushLog = (l) => {
+            if (l.seq <= logCache.seq) return logCache.list;
+            logCache.list = [l, ...logCache.list].slice(0, logCache.capacity);
+            logCache.seq = l.seq;
+            return logCache.list;
+        };
+        const fetchLogs = async () => applyLogs(await fetch(`/api/logs?since=${logCache.seq}&boot=${logCache.boot}`).then(r => r.json()));
+
         function App() {
             const [status, setStatus] = useState({
                 isRunning: false,
@@ -144,26 +179,53 @@ except FileNotFoundError:
 
             useEffect(() => {
                 fetchStatus();
-                const interval = setInterval(fetchStatus, 2000);
-                return () => clearInterval(interval);
+                // 상태/로그는 /api/stream(SSE) 으로 받고, 연결이 끊기면 다시 붙을 때까지 2초 폴링
+                let fast = null;
+                const slow = setInterval(fetchStatus, 15000);
+                const startPolling = () => { if (!fast) fast = setInterval(fetchStatus, 2000); };
+                const stopPolling = () => { clearInterval(fast); fast = null; };
+                if (!window.EventSource) {
+                    startPolling();
+                    return () => { stopPolling(); clearInterval(slow); };
+                }
+                const es = new EventSource('/api/stream');
+                es.onopen = stopPolling;
+                es.onerror = startPolling;
+                es.addEventListener('status', e => { const d = JSON.parse(e.data); setStatus(s => ({ ...s, ...d })); });
+                es.addEventListener('logs', e => { const list = applyLogs(JSON.parse(e.data)); setStatus(s => ({ ...s, logs: list })); });
+                es.addEventListener('log', e => { const list = pushLog(JSON.parse(e.data)); setStatus(s => ({ ...s, logs: list })); });
+                return () => { es.close(); stopPolling(); clearInterval(slow); };
             }, []);
 
             const fetchStatus = async () => {
                 try {
-                    const res = await fetch('/api/status');
-                    const data = await res.json();
-                    setStatus(data);
+                    const [data, logs] = await Promise.all([
+                        fetch('/api/status').then(r => r.json()),
+                        fetchLogs()
+                    ]);
+                    setStatus({ ...data, logs });
                 } catch (err) { console.error(err); }
             };
 
             const handleStart = async () => await fetch('/api/start', { method: 'POST' });
             const handleStop = async () => await fetch('/api/stop', { method: 'POST' });
+            // 모드/시장 변경은 job id 로 접수되므로 완료될 때까지 /api/jobs/{id} 조회 후 상태 갱신
+            const waitJob = async (id, timeoutMs = 30000) => {
+                const until = Date.now() + timeoutMs;
+                while (Date.now() < until) {
+                    const j = await fetch(`/api/jobs/${id}`).then(r => r.json());
+                    if (j.status === 'done' || j.status === 'error') return j;
+                    await new Promise(r => setTimeout(r, 500));
+                }
+                return null;
+            };
             const handleMode = async (mode) => {
-                await fetch('/api/mode', {
+                const r = await fetch('/api/mode', {
                     method: 'POST',
                     headers: { 'Content-Type': 'application/json' },
                     body: JSON.stringify({ mode })
-                });
+                }).then(r => r.json());
+                if (r.job_id) await waitJob(r.job_id);
                 fetchStatus();
             };
 
@@ -391,9 +453,10 @@ def internal_get_stock_name(code):
     return stock_map.get(code, code)
 
 try:
-    from stock_names import get_stock_name
+    from stock_names import get_stock_name, register_stock_names
 except ImportError:
     get_stock_name = internal_get_stock_name
+    register_stock_names = lambda names: None
 
 # All required modules are now in the same directory
 # No need for external sys.path additions
@@ -426,10 +489,14 @@ PAPER_ACCOUNT_PROD = os.environ.get("PAPER_ACCOUNT_PROD", "01")
 
 TELEGRAM_TOKEN = os.environ.get("TELEGRAM_TOKEN", "")
 CHAT_ID = os.environ.get("CHAT_ID", "")
+notifier = TelegramNotifier(TELEGRAM_TOKEN, CHAT_ID)
+hub = EventHub()
 
 # 해외주식 설정
 OVERSEAS_EXCHANGE = os.environ.get("OVERSEAS_EXCHANGE", "NASD")  # NASD (미국전체), NAS (나스닥), NYSE (뉴욕)
 DEFAULT_MARKET = os.environ.get("DEFAULT_MARKET", "domestic")  # domestic 또는 overseas
+# 멀티마켓: 국내/해외 엔진을 동시에 실행 (상태/루프/호출 한도 분리, KIS 인증·토큰·실시간 세션은 공유)
+MULTI_MARKET = os.environ.get("MULTI_MARKET", "false").lower() in ("1", "true", "yes")
 
 # 계좌 정보 로드 확인 로그
 if not KIS_ACCOUNT_NO:
@@ -465,21 +532,52 @@ vops: "ws://ops.koreainvestment.com:31000"
 try:
     update_kis_config() 
     import kis_auth as ka
+    ka.set_rate_budget(rate_scope)  # 모든 REST 호출을 실전/모의 한도(엔진 스레드는 엔진별 몫) 안에서 우선순위 순으로 전송
     from domestic_stock_functions import inquire_price, inquire_daily_price, order_cash, inquire_balance, inquire_investor
+    from domestic_stock_functions import inquire_transaction_rank, bulk_trans_num, chk_holiday
+    from realtime_feed import RealtimeFeed
 except ImportError as e:
     print(f"KIS Open API 모듈 로드 실패 (의존성 파일 확인 필요): {e}")
     pass
 
+# 국내 개장일표(chk_holiday, 1일 1회) + 국내/미국 정규장 시간
+# 실시간 체결가 웹소켓 (접속키 하나를 국내/해외 엔진이 공유)
+realtime_feed = RealtimeFeed() if 'RealtimeFeed' in globals() else None
+
+market_calendar = TradingCalendar(fetch=(lambda bass_dt: chk_holiday(bass_dt=bass_dt)) if 'chk_holiday' in globals() else None)
+
+# 종목 발굴 시 종목명으로 제외할 상품 (ETF/ETN/스팩 등)
+DISCOVERY_EXCLUDE_KEYWORDS = ("KODEX", "TIGER", "KBSTAR", "RISE", "ARIRANG", "HANARO", "KOSEF", "ACE ", "SOL ", "PLUS ",
+                              "ETN", "스팩", "인버스", "레버리지", "선물")
+
+# 해외 현재가 조회용 거래소 코드 (주문용 NASD/NYSE/AMEX -> 시세용 NAS/NYS/AMS)
+QUOTE_EXCHANGE_CODES = {"NASD": "NAS", "NYSE": "NYS", "AMEX": "AMS"}
+
+# 시장별 일봉 조회 함수 이름 / 응답 컬럼 (일자 컬럼, 시가/고가/저가/종가/거래량 컬럼)
+DAILY_PRICE_FUNCS = {"domestic": "inquire_daily_price", "overseas": "overseas_dailyprice"}
+DAILY_BAR_COLUMNS = {
+    "domestic": ("stck_bsop_date", {"open": "stck_oprc", "high": "stck_hgpr", "low": "stck_lwpr", "close": "stck_clpr", "volume": "acml_vol"}),
+    "overseas": ("xymd", {"open": "open", "high": "high", "low": "low", "close": "clos", "volume": "tvol"}),
+}
+
 # 해외주식 모듈 import
 try:
-    from overseas_stock_functions import price as overseas_price, inquire_balance as overseas_inquire_balance, order as overseas_order
+    from overseas_stock_functions import price as overseas_price, price_many as overseas_price_many, inquire_balance as overseas_inquire_balance, order as overseas_order
+    from overseas_stock_functions import dailyprice as overseas_dailyprice
     OVERSEAS_AVAILABLE = True
     print("[INFO] Overseas stock module loaded successfully")
 except ImportError as e:
     print(f"[WARN] 해외주식 모듈 로드 실패 (기능 제한): {e}")
     OVERSEAS_AVAILABLE = False 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # 종료 시 대기 중인 거래 로그 기록
+    trade_journal.close()
+    notifier.close()
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -491,13 +589,38 @@ app.add_middleware(
 class ModeChange(BaseModel):
     mode: str 
 
+# 봇 상태 레코드: 생성 시점에 파이썬 기본 타입으로 변환해 보관 (직렬화 시 별도 변환 없음)
+@dataclass(slots=True)
+class Holding:
+    buy_price: float
+    qty: int
+    high_price: float
+    name: str
+    suspended: bool = False
+
+@dataclass(slots=True)
+class TargetInfo:
+    rsi: Optional[float]  # 계산 불가(변동 없음)면 None
+    price: float
+    ma20: float
+    investor: bool
+
 class StockBot:
-    def __init__(self):
+    """
+    시장 하나(국내 또는 해외)를 매매하는 엔진.
+    멀티마켓에서는 시장별로 하나씩 만들고 label(로그 접두어), 공유 logs 를 넘긴다.
+    REST 호출 한도는 계좌 전체 예산 하나를 두 엔진이 함께 쓰고, 대기 순서는 요청 우선순위(청산 > 일반 > 스캔)로 정해진다.
+    """
+    def __init__(self, market_type=DEFAULT_MARKET, label="", logs=None):
         self.is_running = False
         self.mode = "paper"
+        self.label = label
+        # REST 호출 한도 (계좌 전체 예산 공유: 한쪽 시장이 휴장이면 다른 엔진이 한도 전체를 사용)
+        self.rate_budget = rate_budget
+        self.hub_primary = True  # 대시보드 푸시(status) 대상 엔진 여부
         
         # 시장 타입 (domestic 또는 overseas)
-        self.market_type = DEFAULT_MARKET  # "domestic" 또는 "overseas"
+        self.market_type = market_type  # "domestic" 또는 "overseas"
         self.overseas_exchange = OVERSEAS_EXCHANGE  # "NASD", "NYSE", "AMEX" 등
         self.currency = "KRW" if self.market_type == "domestic" else "USD"
         
@@ -514,11 +637,40 @@ class StockBot:
         self.target_stocks = self.domestic_target_stocks if self.market_type == "domestic" else self.overseas_target_stocks
         
         self.target_stock_info = {} 
+        # 종목 발굴 (순위 API -> 병합/중복 제거 -> 저비용 필터 -> 후보 유니버스 캐시)
+        self.universe = []  # [(code, {"name", "price", "change", "value", "hits", "score"})] 점수순
+        self.universe_updated = 0.0
+        self.universe_ttl = 600  # 순위 재조회 간격 (초)
+        self.universe_size = 20  # 스캔 대상 최대 종목 수 (종목별 REST 호출 상한)
+        self.min_price = 1000
+        self.min_trade_value = 1e9  # 누적 거래대금 하한 (원)
+        self.daily_cache = {}  # code -> 세션 일봉 이력 요약 (load_daily_history)
+        self.daily_cache_day = None  # daily_cache 항목의 기준 일자
+        self.quote_cache = {}  # code -> (조회 시각, 현재가)
+        self.quote_ttl = 1  # 청산 감시용 (루프 주기마다 갱신)
+        self.scan_quote_ttl = 15  # 매수 후보 스캔용
+        self.investor_cache = {}  # code -> (조회 시각, 순매수 여부)
+        # 실시간 체결가 (웹소켓): 수신 틱으로 live_quotes/quote_cache 를 갱신하고 보유 종목은 바로 청산 판단
+        self.feed = realtime_feed
+        self.live_quotes = {}  # (market, code) -> {"price", "high"(당일 고가), "time"}
+        self.stream_fallback_ttl = 30  # 실시간 구독 중인 보유 종목은 이 시간 동안 틱이 없을 때만 REST 조회
+        self.tick_thread = None
+        self.wake = threading.Event()  # 장 마감/정지 대기 중인 트레이딩 루프 깨우기 (시작/정지/모드/시장 변경)
+        self.exit_lock = threading.RLock()
+        # 종목 평가/청산 시세 조회 병렬 실행 (실제 호출 속도는 rate_budget 이 제한)
+        self.eval_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix=f"stock-eval-{market_type}",
+                                            initializer=bind_budget, initargs=(self.rate_budget,))
+        self.investor_ttl = 60
+        self.suspend_cache = {}  # code -> (확인 시각, 거래정지 여부), 국내 현재가 조회 응답으로 갱신
+        self.suspend_ttl = 1800  # 보유 종목 상태 재확인 간격
         self.bought_stocks = {} 
         self.balance = 0 # 예수금
         self.total_buy_amount = 0 # 총 매입금액 추가
         self.entry_amount = 100000 
-        self.logs = []
+        self.logs = logs if logs is not None else LogBuffer(100)
+        self.status_lock = threading.Lock()
+        self.status_cache = {}  # 섹션 -> (지문, 직렬화 조각)
+        self.published_fps = {}  # 섹션 -> 마지막으로 푸시한 지문
         
         # 시장 분석 상태
         self.market_status = "SIDEWAYS"
@@ -532,24 +684,39 @@ class StockBot:
         
         self.csv_file = "trade_log.csv"
         self.init_csv()
+        self.load_trade_stats()
         self.auth()
         # 초기 실행 시 계좌 정보 동기화
         self.update_account_info()
 
     def init_csv(self):
-        if not os.path.exists(self.csv_file):
-            with open(self.csv_file, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(["Time", "Type", "Code", "Price", "Qty", "ProfitRate", "Reason"])
-
-    def save_trade_log(self, type, code, price, qty, profit_rate, reason):
-        with open(self.csv_file, 'a', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow([datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'), type, code, price, qty, f"{profit_rate:.2f}%", reason])
+        trade_journal.register(self.csv_file, ["Time", "Type", "Code", "Price", "Qty", "ProfitRate", "Reason"])
+
+    def save_trade_log(self, type, code, price, qty, profit_rate, reason, buy_price=None):
+        # 파일 기록은 trade_journal 백그라운드 스레드에서 일괄 처리 (주문 경로에서 파일 I/O 제거)
+        ts = int(time.time())  # CSV 와 저장소에 같은 시각 기록 (중복 판별 키)
+        trade_journal.append(self.csv_file, [datetime.datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S'), type, code, price, qty, f"{profit_rate:.2f}%", reason])
+        is_sell = type == "SELL"
+        trade_store.record_trade(
+            "stock", type, code, price, mode=self.mode, qty=qty, buy_price=buy_price,
+            profit_rate=profit_rate if is_sell else None,
+            profit_amount=(price - buy_price) * qty if is_sell and buy_price else None,
+            reason=reason, ts=ts, currency=self.currency
+        )
+
+    def load_trade_stats(self):
+        """거래 저장소에서 이 엔진 시장(통화)의 누적 거래/승리 횟수 복원 (재시작 시 초기화 방지)"""
+        try:
+            stats = trade_store.win_rate(bot="stock", mode=self.mode, currency=self.currency)
+            self.trade_count = stats["trades"]
+            self.win_count = stats["wins"]
+        except Exception as e:
+            print(f"[ERROR] 거래 통계 복원 실패: {e}")
 
     def auth(self):
         try:
             svr = "prod" if self.mode == "real" else "vps"
+            rate_budget.set_rate(RATE_LIMITS[svr])
             if 'ka' in globals():
                 ka.auth(svr=svr, product=KIS_ACCOUNT_PROD)
                 self.log(f"KIS API 인증 성공 ({self.mode.upper()})", "SYSTEM")
@@ -575,6 +742,7 @@ class StockBot:
             self.log("해외주식 모듈이 로드되지 않아 해외 시장으로 전환할 수 없습니다", "ERROR")
             return
         
+        if self.feed is not None and market_type != self.market_type: self.feed.set_codes(self.market_type, [])
         self.market_type = market_type
         self.currency = "KRW" if market_type == "domestic" else "USD"
         self.target_stocks = self.domestic_target_stocks if market_type == "domestic" else self.overseas_target_stocks
@@ -582,6 +750,8 @@ class StockBot:
         # 기존 데이터 초기화 (시장 전환 시)
         self.bought_stocks = {}
         self.target_stock_info = {}
+        self.universe_updated = 0.0  # 국내 복귀 시 바로 재발굴
+        self.load_trade_stats()  # 누적 거래/승리 횟수도 새 시장 통화 기준으로
         
         market_name = "국내" if market_type == "domestic" else "해외"
         self.log(f"시장 변경 완료: {market_name} ({self.currency})", "SYSTEM")
@@ -590,16 +760,27 @@ class StockBot:
         self.update_account_info()
 
     def check_is_suspended(self, code):
-        """종목 거래정지 여부 확인 (코드 58: 거래정지)"""
-        try:
-            if 'inquire_price' not in globals(): return False
-            env_dv = "real" if self.mode == "real" else "demo"
-            res = inquire_price(env_dv=env_dv, fid_input_iscd=code)
-            if res and isinstance(res, dict):
-                status_code = res.get('output', {}).get('iscd_stat_cls_code') if 'output' in res else res.get('iscd_stat_cls_code')
-                if status_code == '58': return True
-            return False
-        except: return False
+        """종목 거래정지 여부 (suspend_cache 기준, API 호출 없음. 확인 전이면 False)"""
+        cached = self.suspend_cache.get(code)
+        return bool(cached and cached[1])
+
+    def note_suspension(self, code, row):
+        """현재가 조회 응답의 종목 상태를 캐시에 반영 (iscd_stat_cls_code 58: 거래정지, temp_stop_yn Y: 임시정지)"""
+        suspended = str(row.get('iscd_stat_cls_code', '')) == '58' or str(row.get('temp_stop_yn', 'N')) == 'Y'
+        self.suspend_cache[code] = (time.time(), suspended)
+        info = self.bought_stocks.get(code)
+        if info is not None: info.suspended = suspended
+
+    def refresh_suspensions(self):
+        """보유 종목 중 상태 확인이 suspend_ttl 보다 오래된 종목만 현재가를 다시 조회해 갱신 (국내만)"""
+        if self.market_type != "domestic": return
+        now = time.time()
+        for code in list(self.bought_stocks):
+            cached = self.suspend_cache.get(code)
+            if cached and now - cached[0] < self.suspend_ttl: continue
+            self.get_quote(code, max_age=0)
+            if self.suspend_cache.get(code) is cached:  # 조회 실패: 다음 주기까지 재시도하지 않음
+                self.suspend_cache[code] = (now, bool(cached and cached[1]))
 
     def update_account_info(self):
         """계좌 잔고 및 보유 종목 동기화 함수 (국내/해외 자동 선택)"""
@@ -641,22 +822,20 @@ class StockBot:
                             code = row['pdno']
                             qty = int(row['hldg_qty'])
                             if qty > 0:
-                                self.bought_stocks[code] = {
-                                    "buy_price": float(row['pchs_avg_pric']),
-                                    "qty": qty,
-                                    "high_price": float(row['prpr']),
-                                    "name": row['prdt_name'],
-                                    "suspended": False
-                                }
+                                self.bought_stocks[code] = Holding(
+                                    buy_price=float(row['pchs_avg_pric']),
+                                    qty=qty,
+                                    high_price=float(row['prpr']),
+                                    name=str(row['prdt_name'])
+                                )
                     
-                    # 거래정지 상태 업데이트
-                    for code in list(self.bought_stocks.keys()):
-                        if self.check_is_suspended(code):
-                            self.bought_stocks[code]['suspended'] = True
+                    # 거래정지 상태는 캐시 값 적용 (현재가 조회 시 함께 갱신되므로 종목별 추가 조회 없음)
+                    for code, info in self.bought_stocks.items():
+                        info.suspended = self.check_is_suspended(code)
 
                     # 총 매입금액 수동 계산 (API 미제공 시)
                     if self.total_buy_amount == 0 and self.bought_stocks:
-                        self.total_buy_amount = sum(s['buy_price'] * s['qty'] for s in self.bought_stocks.values())
+                        self.total_buy_amount = sum(s.buy_price * s.qty for s in self.bought_stocks.values())
 
                     self.log(f"계좌 동기화 완료: 예수금 {self.balance:,.0f}원, 매입금 {self.total_buy_amount:,.0f}원", "SYSTEM")
             
@@ -695,13 +874,12 @@ class StockBot:
                         if qty > 0:
                             buy_price = float(row.get('pchs_avg_pric', 0))  # 매입평균가격
                             current_price = float(row.get('now_pric2', 0))  # 현재가
-                            self.bought_stocks[code] = {
-                                "buy_price": buy_price,
-                                "qty": qty,
-                                "high_price": current_price,
-                                "name": row.get('ovrs_item_name', code),  # 해외종목명
-                                "suspended": False
-                            }
+                            self.bought_stocks[code] = Holding(
+                                buy_price=buy_price,
+                                qty=qty,
+                                high_price=current_price,
+                                name=str(row.get('ovrs_item_name', code))  # 해외종목명
+                            )
                             self.total_buy_amount += buy_price * qty
                 
                 self.log(f"계좌 동기화 완료: 예수금 ${self.balance:,.2f}, 매입금 ${self.total_buy_amount:,.2f}", "SYSTEM")
@@ -711,18 +889,26 @@ class StockBot:
 
     def log(self, msg, type="INFO"):
         timestamp = datetime.datetime.now().strftime('%H:%M:%S')
+        msg = self.label + msg
         print(f"[{timestamp}] [{self.mode.upper()}] {msg}")
-        self.logs.insert(0, {"time": timestamp, "type": type, "msg": msg})
-        self.logs = self.logs[:100]
+        entry = {"time": timestamp, "type": type, "msg": msg}
+        self.logs.append(entry)
+        hub.publish("log", entry)
         if type in ["BUY", "SELL", "ERROR", "SYSTEM"]:
             self.send_telegram(f"[{type}] {msg}")
 
     def send_telegram(self, msg):
-        if TELEGRAM_TOKEN and CHAT_ID:
-            try:
-                url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
-                requests.get(url, params={"chat_id": CHAT_ID, "text": msg})
-            except: pass
+        notifier.send(msg)
+
+    def archive_daily_bars(self, code, df, market_type="domestic", venue="krx"):
+        """일봉 조회 결과(국내 inquire_daily_price / 해외 dailyprice)를 캔들 아카이브에 기록 (완성된 일봉만)"""
+        try:
+            date_col, cols = DAILY_BAR_COLUMNS[market_type]
+            bars = pd.DataFrame({name: pd.to_numeric(df[col], errors='coerce') for name, col in cols.items()})
+            bars.index = pd.to_datetime(df[date_col], format='%Y%m%d')
+            candle_archive.append_frame(venue, "day", code, bars.dropna())
+        except Exception as e:
+            print(f"[ERROR] 캔들 아카이브 기록 실패({code}): {e}")
 
     def analyze_market(self):
         """시장 지표(KODEX 200) 분석을 통한 추세 파악 및 설정 자동 조정"""
@@ -740,6 +926,7 @@ class StockBot:
             if res is None or res.empty: return
 
             df = res.sort_values('stck_bsop_date')
+            self.archive_daily_bars("069500", df)
             close = pd.to_numeric(df['stck_clpr'])
             
             # RSI 지표 계산 (14일 기준)
@@ -777,64 +964,244 @@ class StockBot:
         except Exception as e:
             self.log(f"시장 분석 오류: {e}", "ERROR")
 
-    def discover_stocks(self):
+    def fetch_rankings(self):
+        """순위 API 조회: 거래대금/거래량 상위 + 대량체결 매수 상위 -> [(출처, DataFrame)]"""
+        sources = []
+        for label, scr in (("거래대금", "21010"), ("거래량", "21011")):
+            try:
+                rc, df = inquire_transaction_rank(fid_cond_mrkt_div_code="J", fid_cond_scr_div_code=scr,
+                                                  fid_input_iscd="0000", fid_vol_cnt="100")
+                if rc == 0: sources.append((label, df))
+            except Exception as e:
+                print(f"[ERROR] {label} 순위 조회 실패: {e}")
+            ka.smart_sleep()
         try:
-            self.log("종목 스캔 중... (거래대금 상위)", "INFO")
-            candidates = ["005930", "000660", "035420", "035720", "005380", "051910", "000270", "006400", "068270"]
-            self.target_stocks = candidates[:10]
-        except: pass
-
-    def get_market_data(self, code):
+            df = bulk_trans_num(
+                fid_aply_rang_prc_2="", fid_cond_mrkt_div_code="J", fid_cond_scr_div_code="11909",
+                fid_input_iscd="0000", fid_rank_sort_cls_code="0", fid_div_cls_code="0", fid_input_price_1="",
+                fid_aply_rang_prc_1="", fid_input_iscd_2="", fid_trgt_exls_cls_code="0", fid_trgt_cls_code="0",
+                fid_vol_cnt="", max_depth=1
+            )
+            sources.append(("대량체결", df))
+        except Exception as e:
+            print(f"[ERROR] 대량체결 순위 조회 실패: {e}")
+        ka.smart_sleep()
+        return sources
+
+    def build_universe(self, sources):
+        """
+        순위 결과를 종목코드로 병합(중복 제거)하고 순위 행에 있는 값만으로 필터링 (종목별 추가 조회 없음).
+        여러 순위에 함께 오른 종목일수록, 순위가 높을수록 점수가 높다.
+        """
+        merged = {}
+        for label, df in sources:
+            if df is None or df.empty or 'mksc_shrn_iscd' not in df: continue
+            for rank, row in enumerate(df.to_dict('records')):
+                code = str(row.get('mksc_shrn_iscd') or '').strip()
+                if not code: continue
+                try:
+                    price = float(row.get('stck_prpr') or 0)
+                    change = float(row.get('prdy_ctrt') or 0)
+                    value = float(row.get('acml_tr_pbmn') or 0) or price * float(row.get('acml_vol') or 0)
+                except (TypeError, ValueError):
+                    continue
+                m = merged.setdefault(code, {"name": str(row.get('hts_kor_isnm') or code).strip(),
+                                             "price": price, "change": change, "value": value, "hits": 0, "score": 0.0})
+                m["value"] = max(m["value"], value)
+                m["hits"] += 1
+                m["score"] += 1.0 / (rank + 1)
+
+        universe = [(code, m) for code, m in merged.items() if self.passes_discovery_filter(code, m)]
+        universe.sort(key=lambda x: (x[1]["hits"], x[1]["score"]), reverse=True)
+        return universe
+
+    def passes_discovery_filter(self, code, m):
+        """보통주 / ETF·ETN·스팩 제외 / 매수 가능 가격대 / 급등(20% 초과) 제외 / 거래대금 하한"""
+        if len(code) != 6 or not code.isdigit() or not code.endswith("0"): return False  # 우선주 등 제외
+        if any(k in m["name"] for k in DISCOVERY_EXCLUDE_KEYWORDS): return False
+        if not self.min_price <= m["price"] <= self.entry_amount: return False  # 1주 이상 매수 가능
+        if not -10.0 <= m["change"] <= 20.0: return False
+        return m["value"] >= self.min_trade_value
+
+    def discover_stocks(self, force=False):
+        """시장 전체 순위에서 매수 후보 유니버스 구성 (universe_ttl 동안 캐시, 해외는 고정 목록 사용)"""
+        if self.market_type != "domestic": return
+        if not force and time.time() - self.universe_updated < self.universe_ttl: return
+        self.universe_updated = time.time()  # 실패해도 ttl 동안은 재조회하지 않음
+        if 'inquire_transaction_rank' not in globals(): return
         try:
-            if 'inquire_daily_price' not in globals(): return None, None, None, None, False
-            env_dv = "real" if self.mode == "real" else "demo"
-            fid_cond_mrkt_div_code = "J"
-            
+            self.log("종목 스캔 중... (거래대금/거래량/대량체결 상위)", "INFO")
+            with request_priority(PRIORITY_SCAN): sources = self.fetch_rankings()
+            universe = self.build_universe(sources)
+            if not universe:
+                self.log("종목 발굴 결과 없음 - 기존 후보 유지", "INFO")
+                return
+            self.universe = universe
+            register_stock_names({code: m["name"] for code, m in universe})
+            self.target_stocks = [code for code, _ in universe[:self.universe_size]]
+            self.target_stock_info = {c: v for c, v in self.target_stock_info.items() if c in self.target_stocks}
+            total = sum(len(df) for _, df in sources if df is not None)
+            self.log(f"종목 발굴 완료: 순위 {total}건 -> 후보 {len(universe)}개 중 상위 {len(self.target_stocks)}개 스캔", "INFO")
+        except Exception as e:
+            self.log(f"종목 발굴 오류: {e}", "ERROR")
+
+    def load_daily_history(self, code, env_dv):
+        """
+        일봉 이력을 세션(일자)당 한 번만 조회해 보관 (날짜가 바뀌면 이전 일자 항목은 비움).
+        국내는 inquire_daily_price, 해외는 기간별시세(dailyprice)를 쓰고, 일자는 해당 시장 시간대 기준.
+        마지막 봉이 오늘 날짜면 장중 갱신되는 '오늘 봉'이므로 제외한 뒤, RSI(14)/MA20 계산용 합계를 미리 구해 둔다.
+        (장 시작 전에는 마지막 봉이 직전 거래일 봉이므로 그대로 사용)
+        """
+        today = datetime.datetime.now(SESSIONS[self.market_type][0]).date()
+        if self.daily_cache_day != today.isoformat():
+            self.daily_cache.clear()
+            self.daily_cache_day = today.isoformat()
+        entry = self.daily_cache.get(code)
+        if entry: return entry
+
+        if self.market_type == "domestic":
             res = inquire_daily_price(
                 env_dv=env_dv,
-                fid_cond_mrkt_div_code=fid_cond_mrkt_div_code,
-                fid_input_iscd=code, 
-                fid_period_div_code="D", 
+                fid_cond_mrkt_div_code="J",
+                fid_input_iscd=code,
+                fid_period_div_code="D",
                 fid_org_adj_prc="1"
             )
-            
-            if res is None or res.empty: return None, None, None, None, False
+            venue = "krx"
+        else:
+            excd = QUOTE_EXCHANGE_CODES.get(self.overseas_exchange, self.overseas_exchange)
+            res = overseas_dailyprice(excd=excd, symb=code, env_dv=env_dv)
+            venue = excd.lower()
+        ka.smart_sleep()
+        date_col, cols = DAILY_BAR_COLUMNS[self.market_type]
+        if res is None or res.empty or date_col not in res: return None
+
+        df = res[res[date_col].astype(str).str.strip() != ""].sort_values(date_col)
+        self.archive_daily_bars(code, df, self.market_type, venue)
+        base = pd.to_numeric(df[cols["close"]]).tolist()
+        if str(df[date_col].iloc[-1]) == today.strftime('%Y%m%d'): base = base[:-1]
+        if len(base) < 19: return None
+
+        # 오늘 봉을 제외한 직전 13개 변화량 (오늘 변화량과 합쳐 14일 RSI)
+        deltas = [b - a for a, b in zip(base[-14:-1], base[-13:])]
+        entry = {
+            "day": today.isoformat(),
+            "prev_close": base[-1],
+            "gain13": sum(d for d in deltas if d > 0),
+            "loss13": sum(-d for d in deltas if d < 0),
+            "sum19": sum(base[-19:]),
+        }
+        self.daily_cache[code] = entry
+        return entry
+
+    def get_quote(self, code, max_age=None):
+        """
+        청산 감시용 경량 현재가 (max_age 초, 기본 quote_ttl 캐시).
+        국내: inquire_price(stck_prpr), 해외: 해외 현재체결가(last). 네트워크 조회 후에만 호출 간격 대기
+        """
+        now = time.time()
+        key = (self.market_type, code)
+        cached = self.quote_cache.get(key)
+        if cached and now - cached[0] < (self.quote_ttl if max_age is None else max_age): return cached[1]
+
+        env_dv = "real" if self.mode == "real" else "demo"
+        if self.market_type == "domestic":
+            if 'inquire_price' not in globals(): return None
+            fetch, col = lambda: inquire_price(env_dv=env_dv, fid_cond_mrkt_div_code="J", fid_input_iscd=code), 'stck_prpr'
+        else:
+            if not OVERSEAS_AVAILABLE: return None
+            excd = QUOTE_EXCHANGE_CODES.get(self.overseas_exchange, self.overseas_exchange)
+            fetch, col = lambda: overseas_price(excd=excd, symb=code, env_dv=env_dv), 'last'
+        try:
+            res = fetch()
+        except Exception as e:
+            print(f"[ERROR] 현재가 조회 실패({code}): {e}")
+            return None
+        finally:
+            ka.smart_sleep()
+
+        if res is None or res.empty or col not in res: return None
+        if self.market_type == "domestic": self.note_suspension(code, res.iloc[0])
+        try: price = float(res[col].iloc[0])
+        except (TypeError, ValueError): return None
+        if price <= 0: return None
+        self.quote_cache[key] = (now, price)
+        return price
+
+    def prefetch_quotes(self, codes, ages):
+        """
+        해외: quote_cache 가 오래된 종목 현재가를 price_many 로 한 번에 병렬 조회해 채움 (이후 get_quote 는 캐시 적중).
+        ages 는 종목별 허용 캐시 시간(None 이면 quote_ttl). 국내는 종목별 get_quote 로 조회
+        """
+        if self.market_type != "overseas" or not OVERSEAS_AVAILABLE or 'overseas_price_many' not in globals(): return
+        now = time.time()
+        stale = []
+        for code, age in zip(codes, ages):
+            cached = self.quote_cache.get((self.market_type, code))
+            if not cached or now - cached[0] >= (self.quote_ttl if age is None else age): stale.append(code)
+        if not stale: return
+        excd = QUOTE_EXCHANGE_CODES.get(self.overseas_exchange, self.overseas_exchange)
+        try:
+            df = overseas_price_many([(excd, code) for code in stale], env_dv="real" if self.mode == "real" else "demo",
+                                     max_age=self.quote_ttl)
+        except Exception as e:
+            print(f"[ERROR] 해외 현재가 일괄 조회 실패: {e}")
+            return
+        for code, price, fetched_at in zip(df["symb"], df["last"], df["fetched_at"]):
+            if price > 0: self.quote_cache[(self.market_type, code)] = (fetched_at, float(price))
+
+    def get_investor_buy(self, code, env_dv):
+        """외국인/기관 순매수 여부 (investor_ttl 초 캐시)"""
+        if self.market_type != "domestic": return True  # 해외는 투자자별 매매동향 조회가 없어 수급 조건 미적용
+        now = time.time()
+        cached = self.investor_cache.get(code)
+        if cached and now - cached[0] < self.investor_ttl: return cached[1]
+
+        investor_res = inquire_investor(
+            env_dv=env_dv,
+            fid_cond_mrkt_div_code="J",
+            fid_input_iscd=code
+        )
+        ka.smart_sleep()
+        
+        is_investor_buy = False
+        if investor_res is not None and not investor_res.empty:
+            try:
+                recent = investor_res.iloc[0]
+                frgn = float(recent.get('frgn_ntby_qty', 0)) 
+                orgn = float(recent.get('orgn_ntby_qty', 0))
+                if frgn > 0 or orgn > 0: is_investor_buy = True
+            except: pass
+        self.investor_cache[code] = (now, is_investor_buy)
+        return is_investor_buy
 
-            df = res.sort_values('stck_bsop_date') 
-            close = pd.to_numeric(df['stck_clpr'])
-            
-            delta = close.diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rsi = (100 - (100 / (1 + (gain / loss)))).iloc[-1]
+    def get_market_data(self, code):
+        try:
+            if DAILY_PRICE_FUNCS[self.market_type] not in globals(): return None, None, None, None, False
+            env_dv = "real" if self.mode == "real" else "demo"
+
+            hist = self.load_daily_history(code, env_dv)
+            if hist is None: return None, None, None, None, False
+            current_price = self.get_quote(code, max_age=self.scan_quote_ttl)
+            if current_price is None: return None, None, None, None, False
 
-            ma20 = close.rolling(window=20).mean().iloc[-1]
-            current_price = close.iloc[-1]
+            # 오늘 봉만 현재가로 바꿔 RSI(14)/MA20 갱신 (rolling mean 식과 동일, 평균의 비 = 합계의 비)
+            prev_close = hist["prev_close"]
+            delta = current_price - prev_close
+            gain = hist["gain13"] + max(delta, 0)
+            loss = hist["loss13"] + max(-delta, 0)
+            rsi = 100 - (100 / (1 + gain / loss)) if loss > 0 else (100.0 if gain > 0 else float('nan'))
+            ma20 = (hist["sum19"] + current_price) / 20
 
-            prev_close = close.iloc[-2]
             is_too_high = (current_price - prev_close) / prev_close * 100 > 20.0
+            is_investor_buy = self.get_investor_buy(code, env_dv)
 
-            investor_res = inquire_investor(
-                env_dv=env_dv,
-                fid_cond_mrkt_div_code=fid_cond_mrkt_div_code,
-                fid_input_iscd=code
+            self.target_stock_info[code] = TargetInfo(
+                rsi=None if rsi != rsi else float(rsi),  # NaN 은 JSON 으로 표현 불가
+                price=float(current_price),
+                ma20=float(ma20),
+                investor=bool(is_investor_buy)
             )
-            
-            is_investor_buy = False
-            if investor_res is not None and not investor_res.empty:
-                try:
-                    recent = investor_res.iloc[0]
-                    frgn = float(recent.get('frgn_ntby_qty', 0)) 
-                    orgn = float(recent.get('orgn_ntby_qty', 0))
-                    if frgn > 0 or orgn > 0: is_investor_buy = True
-                except: pass
-
-            self.target_stock_info[code] = {
-                "rsi": float(rsi), 
-                "price": float(current_price), 
-                "ma20": float(ma20),
-                "investor": is_investor_buy
-            }
 
             return rsi, ma20, current_price, is_too_high, is_investor_buy
 
@@ -868,7 +1235,7 @@ class StockBot:
                 )
                 
                 if not res.empty:
-                    self.bought_stocks[code] = {"buy_price": price, "qty": qty, "high_price": price, "name": name, "suspended": False}
+                    self.bought_stocks[code] = Holding(buy_price=float(price), qty=qty, high_price=float(price), name=str(name))
                     self.log(f"매수: {name}({code}) {qty}주 @ {price:,.0f}원 ({reason})", "BUY")
                     self.save_trade_log("BUY", code, price, qty, 0, reason)
                     self.update_account_info()
@@ -895,7 +1262,7 @@ class StockBot:
                 )
                 
                 if res is not None and not res.empty:
-                    self.bought_stocks[code] = {"buy_price": price, "qty": qty, "high_price": price, "name": name, "suspended": False}
+                    self.bought_stocks[code] = Holding(buy_price=float(price), qty=qty, high_price=float(price), name=str(name))
                     self.log(f"매수: {name} {qty}shares @ ${price:.2f} ({reason})", "BUY")
                     self.save_trade_log("BUY", code, price, qty, 0, reason)
                     self.update_account_info()
@@ -907,7 +1274,7 @@ class StockBot:
 
     def sell_stock(self, code, price, profit, reason):
         if code not in self.bought_stocks: return
-        qty = self.bought_stocks[code]['qty']
+        qty = self.bought_stocks[code].qty
         
         try:
             env_dv = "real" if self.mode == "real" else "demo"
@@ -927,10 +1294,11 @@ class StockBot:
                 )
                 
                 if not res.empty:
+                    buy_price = self.bought_stocks[code].buy_price
                     del self.bought_stocks[code]
                     self.log(f"매도: {name}({code}) {qty}주 @ {price:,.0f}원 수익률 {profit:.2f}% ({reason})", "SELL")
-                    self.save_trade_log("SELL", code, price, qty, profit, reason)
-                    self.daily_profit += (price - self.bought_stocks.get(code, {}).get('buy_price', price)) * qty
+                    self.save_trade_log("SELL", code, price, qty, profit, reason, buy_price)
+                    self.daily_profit += (price - buy_price) * qty
                     if profit > 0: self.win_count += 1
                     self.trade_count += 1
                     self.update_account_info()
@@ -957,10 +1325,10 @@ class StockBot:
                 )
                 
                 if res is not None and not res.empty:
-                    buy_price = self.bought_stocks[code]['buy_price']
+                    buy_price = self.bought_stocks[code].buy_price
                     del self.bought_stocks[code]
                     self.log(f"매도: {name} {qty}shares @ ${price:.2f} 수익률 {profit:.2f}% ({reason})", "SELL")
-                    self.save_trade_log("SELL", code, price, qty, profit, reason)
+                    self.save_trade_log("SELL", code, price, qty, profit, reason, buy_price)
                     self.daily_profit += (price - buy_price) * qty
                     if profit > 0: self.win_count += 1
                     self.trade_count += 1
@@ -971,151 +1339,353 @@ class StockBot:
         except Exception as e:
             self.log(f"매도 오류: {e}", "ERROR")
 
+    def status_sections(self):
+        """
+        상태를 섹션별 (지문, 값) 으로 구성. 지문은 값의 변경 감지용 튜플이며 레코드는 astuple 로 값만 비교한다.
+        값은 최상위 키 dict 이고, 섹션들을 합치면 /api/status 응답이 된다.
+        """
+        stocks, targets = dict(self.bought_stocks), dict(self.target_stock_info)
+        sections = {
+            "core": {"isRunning": self.is_running, "mode": self.mode, "logSeq": self.logs.seq, "marketType": self.market_type,
+                     "currency": self.currency, "overseasExchange": self.overseas_exchange},
+            "account": {"balance": self.balance, "totalBuyAmount": self.total_buy_amount},
+            "summary": {"summary": {"dailyProfit": self.daily_profit, "tradeCount": self.trade_count, "winCount": self.win_count}},
+            "config": {"config": {"market": self.market_status, "rsi": self.market_rsi, "reason": self.market_reason,
+                                  "targetProfit": self.target_profit, "stopLoss": self.stop_loss}},
+        }
+        out = {name: (tuple(tuple(v.values()) if isinstance(v, dict) else v for v in value.values()), value)
+               for name, value in sections.items()}
+        out["stocks"] = (tuple((c, astuple(h)) for c, h in stocks.items()), {"stocks": stocks})
+        out["target_info"] = (tuple((c, astuple(t)) for c, t in targets.items()), {"target_info": targets})
+        return out
+
+    def encode_status(self):
+        """/api/status 응답 바이트: 지문이 바뀐 섹션만 다시 직렬화하고 나머지는 캐시된 조각을 이어 붙임"""
+        with self.status_lock:
+            parts = []
+            for name, (fp, value) in self.status_sections().items():
+                cached = self.status_cache.get(name)
+                if cached is None or cached[0] != fp:
+                    cached = (fp, fast_json.dumps_fields(value))
+                    self.status_cache[name] = cached
+                parts.append(cached[1])
+            return b"{" + b",".join(parts) + b"}"
+
+    def publish_status(self):
+        """푸시 구독자에게 직전 전송 대비 바뀐 섹션만 전송 (전체 상태는 접속 시 stream() 에서 전송)"""
+        if not hub.subscribers or not self.hub_primary: return
+        try: sections = self.status_sections()
+        except Exception as e:
+            print(f"[ERROR] 상태 스냅샷 생성 실패: {e}")
+            return
+        delta = {}
+        with self.status_lock:
+            for name, (fp, value) in sections.items():
+                if self.published_fps.get(name) != fp:
+                    self.published_fps[name] = fp
+                    delta.update(value)
+        if delta: hub.publish("status", fast_json.dumps(delta))
+
+    def check_exit(self, code, current_price):
+        """트레일링 스탑/손절 판단 후 조건 충족 시 매도 (트레이딩 루프/실시간 틱 스레드 양쪽에서 호출)"""
+        with self.exit_lock:
+            self._check_exit(code, current_price)
+
+    def _check_exit(self, code, current_price):
+        info = self.bought_stocks.get(code)
+        if not info: return
+
+        # 고가 갱신 (트레일링 스탑 기준점)
+        if current_price > info.high_price: 
+            info.high_price = current_price
+        
+        buy_price = info.buy_price
+        profit_rate = (current_price - buy_price) / buy_price * 100
+        
+        # 고점 대비 하락률 (트레일링 스탑)
+        drop_rate = (current_price - info.high_price) / info.high_price * 100
+
+        # 1. 초급등 구간 (20% 이상): 수익 확정 우선
+        if profit_rate >= 20.0 and drop_rate <= -1.5:
+            self.sell_stock(code, current_price, profit_rate, "초급등 후 차익실현(TS)")
+        
+        # 2. 급등 구간 (10%~20%): 변동성 일부 허용
+        elif profit_rate >= 10.0 and drop_rate <= -3.0:
+            self.sell_stock(code, current_price, profit_rate, "급등 후 조정매도")
+        
+        # 3. 목표 달성 구간: 기본 익절 기준
+        elif profit_rate >= self.target_profit and drop_rate <= -2.0:
+            self.sell_stock(code, current_price, profit_rate, "목표달성 후 매도")
+        
+        # 4. 손절 구간
+        elif profit_rate <= self.stop_loss:
+            self.sell_stock(code, current_price, profit_rate, "손절매")
+
+    def evaluate_target(self, code):
+        """매수 후보 1종목 평가 (eval_pool 에서 스캔 우선순위로 실행)"""
+        with request_priority(PRIORITY_SCAN): return self.get_market_data(code)
+
+    def exit_quote(self, code, max_age):
+        """청산 감시용 현재가 (eval_pool 에서 청산 우선순위로 실행)"""
+        with request_priority(PRIORITY_EXIT): return self.get_quote(code, max_age=max_age)
+
+    def monitor_holdings(self):
+        """
+        보유 종목 청산 감시: 현재가만 병렬 조회 (수급/일봉 조회 없음).
+        실시간 구독 중인 종목은 틱 스레드가 청산을 판단하므로 틱이 끊긴 경우에만 REST 로 보완
+        """
+        codes = list(self.bought_stocks.keys())
+        if not codes: return
+        live = self.feed is not None and self.feed.is_live()
+        excd = QUOTE_EXCHANGE_CODES.get(self.overseas_exchange, self.overseas_exchange)
+        ages = [self.stream_fallback_ttl if live and self.feed.is_subscribed(self.market_type, code, excd) else None
+                for code in codes]
+        with request_priority(PRIORITY_EXIT): self.prefetch_quotes(codes, ages)
+        prices = self.eval_pool.map(self.exit_quote, codes, ages)
+        with request_priority(PRIORITY_EXIT):
+            for code, current_price in zip(codes, prices):
+                if current_price: self.check_exit(code, current_price)
+
+    def scan_targets(self):
+        """매수 후보 병렬 평가 후 목록 순서대로 매수 판단"""
+        codes = list(self.target_stocks)
+        for code, (rsi, ma20, price, is_too_high, is_investor_buy) in zip(codes, self.eval_pool.map(self.evaluate_target, codes)):
+            if not price: continue
+            if self.check_is_suspended(code): continue
+            if is_too_high: continue 
+
+            if rsi < 45 and is_investor_buy and price >= ma20:
+                self.buy_stock(code, price, "수급+눌림목💎")
+            elif rsi < 25 and price >= ma20 * 0.98:
+                self.buy_stock(code, price, "과매도 반등📉")
+
+    def sync_feed(self):
+        """실시간 구독 목록을 보유 종목 + 매수 후보로 맞춤 (보유 종목 우선). 처음 호출 시 틱 처리 스레드 시작"""
+        if self.feed is None: return
+        codes = list(dict.fromkeys(list(self.bought_stocks) + list(self.target_stocks)))
+        self.feed.configure("prod" if self.mode == "real" else "vps")
+        self.feed.set_codes(self.market_type, codes, QUOTE_EXCHANGE_CODES.get(self.overseas_exchange, self.overseas_exchange),
+                            env_dv="real" if self.mode == "real" else "demo")
+        if self.tick_thread is None:
+            self.tick_thread = threading.Thread(target=self.process_ticks, name="stock-ticks", daemon=True)
+            self.tick_thread.start()
+
+    def process_ticks(self):
+        """실시간 틱 소비: 쌓인 틱은 종목별로 합쳐(최신가, 구간 최고가) 한 번만 반영 (매도 주문은 청산 우선순위)"""
+        bind_budget(self.rate_budget)
+        with request_priority(PRIORITY_EXIT): self._process_ticks()
+
+    def _process_ticks(self):
+        while True:
+            ticks = self.feed.ticks[self.market_type]  # 시장 전환 시 다음 대기부터 새 시장 큐 사용
+            try: batch = [ticks.get(timeout=1)]
+            except queue.Empty: continue
+            while True:
+                try: batch.append(ticks.get_nowait())
+                except queue.Empty: break
+
+            latest = {}
+            for market, code, price, high, ts in batch:
+                prev = latest.get((market, code))
+                latest[(market, code)] = (price, max(price, prev[1]) if prev else price, high, ts)
+
+            for (market, code), (price, peak, high, ts) in latest.items():
+                self.live_quotes[(market, code)] = {"price": price, "high": high, "time": ts}
+                if price <= 0 or market != self.market_type: continue
+                self.quote_cache[(market, code)] = (ts, price)
+                if not self.is_running or code not in self.bought_stocks: continue
+                try:
+                    with self.exit_lock:
+                        info = self.bought_stocks.get(code)
+                        # 합쳐진 틱 사이의 고점도 트레일링 기준에 반영
+                        if info and peak > info.high_price: info.high_price = peak
+                        self._check_exit(code, price)
+                except Exception as e:
+                    self.log(f"실시간 청산 판단 오류({code}): {e}", "ERROR")
+
     def trading_loop(self):
+        bind_budget(self.rate_budget)
         self.log("주식 자동매매 봇 시작 🚀", "SYSTEM")
         # 봇 시작 시 잔고 한번 더 체크
         self.update_account_info()
         
         loop_count = 0
         while True:
+            self.publish_status()
             if not self.is_running:
-                time.sleep(1)
+                self.wake.wait(1)
+                self.wake.clear()
                 continue
 
-            now = datetime.datetime.now()
-            is_market_open = (9 <= now.hour < 15) or (now.hour == 15 and now.minute <= 20)
-            
-            if self.mode == "real" and not is_market_open:
-                if now.minute == 0 and now.second < 10:
-                    self.log("장 마감 상태. 대기 중...", "INFO")
-                time.sleep(10)
-                continue
+            # 실전 모드는 개장일/정규장 시간에만 매매하고, 그 외에는 다음 개장 시각까지 대기 (API 요청 시 wake 로 즉시 재확인)
+            if self.mode == "real":
+                market_calendar.refresh()
+                if not market_calendar.is_open(self.market_type):
+                    next_open = market_calendar.next_open(self.market_type)
+                    self.log(f"장 마감 상태. 다음 개장 {next_open:%m/%d %H:%M} ({next_open.tzinfo}) 까지 대기", "INFO")
+                    self.publish_status()
+                    self.wake.wait(market_calendar.seconds_until_open(self.market_type))
+                    self.wake.clear()
+                    continue
 
             try:
-                if loop_count % 900 == 0: self.analyze_market()
+                # 청산 감시를 먼저 (시장 분석/발굴/매수 후보 평가보다 우선)
+                self.monitor_holdings()
+                self.refresh_suspensions()
+
+                if loop_count % 900 == 0:
+                    with request_priority(PRIORITY_SCAN): self.analyze_market()
+                self.discover_stocks()  # universe_ttl 마다만 순위 재조회
                 if loop_count % 1800 == 0: 
-                    self.discover_stocks() 
                     self.update_account_info()
                 loop_count += 1
+                self.sync_feed()
 
                 if len(self.bought_stocks) < self.max_stock_count:
-                    for code in self.target_stocks:
-                        rsi, ma20, price, is_too_high, is_investor_buy = self.get_market_data(code)
-                        if not price: continue
-                        if is_too_high: continue 
-
-                        if rsi < 45 and is_investor_buy and price >= ma20:
-                            self.buy_stock(code, price, "수급+눌림목💎")
-                        elif rsi < 25 and price >= ma20 * 0.98:
-                            self.buy_stock(code, price, "과매도 반등📉")
-                        time.sleep(0.2)
-
-                for code in list(self.bought_stocks.keys()):
-                    info = self.bought_stocks[code]
-                    _, _, current_price, _, _ = self.get_market_data(code)
-                    if not current_price: continue
-
-                    # 고가 갱신 (트레일링 스탑 기준점)
-                    if current_price > info['high_price']: 
-                        info['high_price'] = current_price
-                    
-                    buy_price = info['buy_price']
-                    profit_rate = (current_price - buy_price) / buy_price * 100
-                    
-                    # 고점 대비 하락률 (트레일링 스탑)
-                    drop_rate = (current_price - info['high_price']) / info['high_price'] * 100
-
-                    # 1. 초급등 구간 (20% 이상): 수익 확정 우선
-                    if profit_rate >= 20.0 and drop_rate <= -1.5:
-                        self.sell_stock(code, current_price, profit_rate, "초급등 후 차익실현(TS)")
-                    
-                    # 2. 급등 구간 (10%~20%): 변동성 일부 허용
-                    elif profit_rate >= 10.0 and drop_rate <= -3.0:
-                        self.sell_stock(code, current_price, profit_rate, "급등 후 조정매도")
-                    
-                    # 3. 목표 달성 구간: 기본 익절 기준
-                    elif profit_rate >= self.target_profit and drop_rate <= -2.0:
-                        self.sell_stock(code, current_price, profit_rate, "목표달성 후 매도")
-                    
-                    # 4. 손절 구간
-                    elif profit_rate <= self.stop_loss:
-                        self.sell_stock(code, current_price, profit_rate, "손절매")
-                        
-                    time.sleep(0.2)
+                    self.scan_targets()
 
                 time.sleep(1) 
             except Exception as e:
                 self.log(f"루프 오류: {e}", "ERROR")
                 time.sleep(5)
 
-bot = StockBot()
+def create_engines():
+    """단일 모드: DEFAULT_MARKET 엔진 하나 (기존처럼 /api/market 으로 시장 전환). 멀티마켓: 국내/해외 엔진 동시 실행"""
+    if not MULTI_MARKET or not OVERSEAS_AVAILABLE:
+        if MULTI_MARKET: print("[WARN] 해외주식 모듈이 없어 멀티마켓 대신 단일 시장으로 실행합니다")
+        return {"single": StockBot()}
+    logs = LogBuffer(150)
+    return {m: StockBot(market_type=m, label=f"[{name}] ", logs=logs)
+            for m, name in (("domestic", "국내"), ("overseas", "해외"))}
+
+engines = create_engines()
+multi_market = "single" not in engines
+bot = engines.get(DEFAULT_MARKET) or next(iter(engines.values()))  # 대시보드(/api/status, 푸시)가 보여주는 엔진
+for e in engines.values(): e.hub_primary = e is bot
+
+def get_engine(market):
+    engine = bot if not multi_market and market == bot.market_type else engines.get(market)
+    if engine is None: raise HTTPException(status_code=404, detail=f"engine not found: {market}")
+    return engine
+
+def set_primary(market):
+    """멀티마켓: 대시보드에 표시할 엔진 교체 (상태 초기화 없음). 새 엔진의 전체 상태를 푸시"""
+    global bot
+    engine = get_engine(market)
+    for e in engines.values(): e.hub_primary = e is engine
+    bot = engine
+    with engine.status_lock: engine.published_fps = {}
+    engine.publish_status()
+
+# API 핸들러는 메모리 상태만 읽고 바로 반환. 인증/계좌 조회가 필요한 작업은 commands 큐에 넣고 job id 를 돌려준다
+commands = CommandQueue("stock-commands")
+
+def change_mode_job(mode):
+    # KIS 인증/토큰은 프로세스 공용이므로 모든 엔진의 모드를 함께 변경
+    for e in engines.values():
+        e.change_mode(mode)
+        e.wake.set()
+    bot.publish_status()
+    return {"mode": bot.mode}
+
+def change_market_job(market_type):
+    bot.change_market(market_type)
+    bot.wake.set()
+    bot.publish_status()
+    return {"market": bot.market_type, "currency": bot.currency}
+
+@app.get("/api/logs")
+async def get_logs(since: int = 0, boot: Optional[str] = None):
+    """since 이후 로그만 반환 (reset=True 이면 클라이언트는 보관 중인 로그를 버리고 새로 받은 목록으로 교체, boot 가 다르면 재시작으로 보고 reset)"""
+    return bot.logs.delta(since, boot)
 
 @app.get("/api/status")
-def status():
-    # Numpy 데이터 타입 변환 (JSON 직렬화 오류 방지)
-    def convert_numpy(obj):
-        if isinstance(obj, dict):
-            return {k: convert_numpy(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [convert_numpy(i) for i in obj]
-        elif isinstance(obj, (np.int64, np.int32, np.int16, np.int8)):
-            return int(obj)
-        elif isinstance(obj, (np.float64, np.float32)):
-            return float(obj)
-        elif hasattr(obj, 'item'): # numpy 타입인 경우
-            return obj.item()
-        else:
-            return obj
-
-    response_data = {
-        "isRunning": bot.is_running,
-        "mode": bot.mode,
-        "balance": bot.balance, # 예수금 추가
-        "totalBuyAmount": bot.total_buy_amount, # 총 매입금액 추가
-        "stocks": bot.bought_stocks,
-        "target_info": bot.target_stock_info, 
-        "logs": bot.logs,
-        "summary": {
-            "dailyProfit": bot.daily_profit,
-            "tradeCount": bot.trade_count,
-            "winCount": bot.win_count
-        },
-        "config": {
-            "market": bot.market_status,
-            "rsi": bot.market_rsi,
-            "reason": bot.market_reason,
-            "targetProfit": bot.target_profit,
-            "stopLoss": bot.stop_loss
-        },
-        "marketType": bot.market_type,
-        "currency": bot.currency,
-        "overseasExchange": bot.overseas_exchange
-    }
-    return convert_numpy(response_data)
+async def status():
+    return Response(content=bot.encode_status(), media_type="application/json")
+
+@app.get("/api/stream")
+async def stream(request: Request):
+    """대시보드 푸시 채널 (SSE): status(접속 시 전체, 이후 변경분), logs(접속 시 전체), log(새 로그)"""
+    def initial():
+        return [("status", bot.encode_status()),
+                ("logs", bot.logs.delta())]
+    return StreamingResponse(hub.stream(request, initial), media_type="text/event-stream", headers=SSE_HEADERS)
+
+def set_running(engine_list, running):
+    for e in engine_list:
+        e.is_running = running
+        e.wake.set()
+    bot.publish_status()
 
 @app.post("/api/start")
-def start(): bot.is_running = True; return {"status": "started"}
+async def start(): set_running(engines.values(), True); return {"status": "started"}
 
 @app.post("/api/stop")
-def stop(): bot.is_running = False; return {"status": "stopped"}
+async def stop(): set_running(engines.values(), False); return {"status": "stopped"}
 
 @app.post("/api/mode")
-def change_mode(payload: ModeChange):
-    bot.change_mode(payload.mode)
-    return {"status": "ok", "mode": bot.mode}
+async def change_mode(payload: ModeChange):
+    return {"status": "queued", "job_id": commands.submit("mode", change_mode_job, payload.mode)}
 
 @app.post("/api/market")
-def change_market(payload: ModeChange):
-    """Change between domestic and overseas markets"""
-    bot.change_market(payload.mode)
-    return {"status": "ok", "market": bot.market_type, "currency": bot.currency}
+async def change_market(payload: ModeChange):
+    """Change between domestic and overseas markets (멀티마켓에서는 대시보드 표시 엔진만 전환)"""
+    if multi_market:
+        set_primary(payload.mode)
+        return {"status": "ok", "market": bot.market_type, "currency": bot.currency}
+    return {"status": "queued", "job_id": commands.submit("market", change_market_job, payload.mode)}
+
+@app.get("/api/engines")
+async def list_engines():
+    """시장별 엔진 요약 (실행 여부, 잔고, 보유 종목 수, 세션, 호출 한도)"""
+    out = {}
+    for e in ([bot] if not multi_market else engines.values()):
+        out[e.market_type] = {
+            "isRunning": e.is_running, "mode": e.mode, "primary": e.hub_primary, "currency": e.currency,
+            "balance": e.balance, "totalBuyAmount": e.total_buy_amount, "positions": len(e.bought_stocks),
+            "dailyProfit": e.daily_profit, "sessionOpen": market_calendar.is_open(e.market_type),
+            "nextOpen": market_calendar.next_open(e.market_type).isoformat(), "rate": e.rate_budget.stats(),
+        }
+    return {"multiMarket": multi_market, "engines": out}
+
+@app.get("/api/engines/{market}/status")
+async def engine_status(market: str):
+    return Response(content=get_engine(market).encode_status(), media_type="application/json")
+
+@app.post("/api/engines/{market}/start")
+async def engine_start(market: str): set_running([get_engine(market)], True); return {"status": "started", "market": market}
+
+@app.post("/api/engines/{market}/stop")
+async def engine_stop(market: str): set_running([get_engine(market)], False); return {"status": "stopped", "market": market}
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = commands.get(job_id)
+    if job is None: raise HTTPException(status_code=404, detail="job not found")
+    return job
+
+@app.get("/api/trades/pnl")
+async def trades_pnl(group: str = "day", mode: Optional[str] = None, ticker: Optional[str] = None,
+                     reason: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None):
+    """거래 저장소 기준 손익 집계 (group: day / ticker / reason / mode, since/until: YYYY-MM-DD)"""
+    try:
+        return await trade_store.query(trade_store.pnl, group, bot="stock", mode=mode, ticker=ticker, reason=reason, since=since, until=until)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/trades/winrate")
+async def trades_winrate(mode: Optional[str] = None, ticker: Optional[str] = None,
+                         since: Optional[str] = None, until: Optional[str] = None):
+    return await trade_store.query(trade_store.win_rate, bot="stock", mode=mode, ticker=ticker, since=since, until=until)
+
+# stock_trade_ui.html (없으면 내장 HTML_CONTENT) 을 압축본/ETag 와 함께 메모리에서 서빙
+index_page = StaticPage("stock_trade_ui.html", fallback=HTML_CONTENT)
 
-# 수정됨: HTML 파일을 읽는 대신 변수에 저장된 HTML 콘텐츠를 반환
 @app.get("/", response_class=HTMLResponse)
-def read_root():
-    return HTML_CONTENT
+async def read_root(request: Request):
+    return index_page.response(request)
 
 if __name__ == "__main__":
-    t = threading.Thread(target=bot.trading_loop, daemon=True)
-    t.start()
+    for e in engines.values():
+        threading.Thread(target=e.trading_loop, name=f"stock-loop-{e.market_type}", daemon=True).start()
     uvicorn.run(app, host="0.0.0.0", port=8002)
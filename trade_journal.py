@@ -0,0 +1,116 @@
+import atexit
+import csv
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+
+class TradeJournal:
+    """
+    거래 로그 CSV 를 백그라운드 스레드에서 모아서 기록하는 writer.
+    주문 경로에서는 append() 로 큐에 넣기만 하고, 파일 쓰기는 flush_interval 마다 일괄 처리한다.
+    파일은 일자별로 분리된다 (trade_buy_log.csv -> trade_buy_log_20250101.csv).
+    """
+    def __init__(self, flush_interval=1.0, batch_size=500, max_queue=10000):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.q = queue.Queue(maxsize=max_queue)
+        self.headers = {}
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stopped = False
+        self.flush_hooks = []
+
+    def register(self, base_path, header):
+        """로그 파일(기본 경로)과 헤더 등록"""
+        self.headers[base_path] = list(header)
+
+    def path_for(self, base_path, ts=None):
+        stem, ext = os.path.splitext(base_path)
+        day = datetime.fromtimestamp(ts or time.time()).strftime('%Y%m%d')
+        return f"{stem}_{day}{ext}"
+
+    def add_flush_hook(self, fn):
+        """매 flush 주기마다 백그라운드 스레드에서 함께 호출할 함수 등록 (예: TradeStore.flush)"""
+        self.flush_hooks.append(fn)
+
+    def append(self, base_path, row):
+        """행을 큐에 추가 (블로킹 없음, 큐가 가득 차면 버림)"""
+        self.start()
+        try:
+            self.q.put_nowait((base_path, time.time(), row))
+        except queue.Full:
+            print(f"[ERROR] 거래 로그 큐 초과: {base_path} 기록 누락")
+
+    def start(self):
+        if self.thread is not None or self.stopped: return
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="trade-journal", daemon=True)
+                self.thread.start()
+                atexit.register(self.close)
+
+    def _run(self):
+        while not self.stopped:
+            batch = self._drain(timeout=self.flush_interval)
+            # 첫 행이 오면 flush_interval 동안 더 모은 뒤 일자별 파일마다 한 번에 기록
+            deadline = time.time() + self.flush_interval
+            while batch and len(batch) < self.batch_size and not self.stopped:
+                wait = deadline - time.time()
+                if wait <= 0: break
+                batch += self._drain(timeout=wait, limit=self.batch_size - len(batch))
+            if batch: self._write(batch)
+            self._run_hooks()
+
+    def _run_hooks(self):
+        for fn in self.flush_hooks:
+            try: fn()
+            except Exception as e: print(f"[ERROR] flush hook 실패: {e}")
+
+    def _drain(self, timeout=None, limit=None):
+        limit = limit or self.batch_size
+        batch = []
+        try:
+            batch.append(self.q.get(timeout=timeout) if timeout else self.q.get_nowait())
+            while len(batch) < limit:
+                batch.append(self.q.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _write(self, batch):
+        grouped = {}
+        for base_path, ts, row in batch:
+            grouped.setdefault(self.path_for(base_path, ts), (base_path, []))[1].append(row)
+
+        with self.lock:
+            for path, (base_path, rows) in grouped.items():
+                try:
+                    is_new = not os.path.exists(path)
+                    with open(path, 'a', newline='', encoding='utf-8') as f:
+                        writer = csv.writer(f)
+                        if is_new and base_path in self.headers: writer.writerow(self.headers[base_path])
+                        writer.writerows(rows)
+                except Exception as e:
+                    print(f"[ERROR] 거래 로그 기록 실패({path}): {e}")
+
+    def flush(self):
+        """큐에 남은 행을 즉시 기록"""
+        while True:
+            batch = self._drain()
+            if not batch: break
+            self._write(batch)
+        self._run_hooks()
+
+    def close(self):
+        """종료 시 호출: 백그라운드 스레드 정지 후 잔여분 기록"""
+        self.stopped = True
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=self.flush_interval + 1)
+        self.flush()
+
+
+# 두 봇(fast_trade, stock_trade)이 함께 쓰는 공용 writer
+journal = TradeJournal()
@@ -0,0 +1,265 @@
+import asyncio
+import csv
+import functools
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from trade_journal import journal as trade_journal
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    day TEXT NOT NULL,
+    bot TEXT NOT NULL,
+    mode TEXT NOT NULL DEFAULT '',
+    side TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    price REAL,
+    qty REAL,
+    amount REAL,
+    buy_price REAL,
+    profit_rate REAL,
+    profit_amount REAL,
+    held_min REAL,
+    reason TEXT NOT NULL DEFAULT '',
+    rsi REAL,
+    currency TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS ix_trades_ts ON trades(ts);
+CREATE INDEX IF NOT EXISTS ix_trades_day ON trades(side, day);
+CREATE INDEX IF NOT EXISTS ix_trades_ticker ON trades(ticker, ts);
+CREATE INDEX IF NOT EXISTS ix_trades_mode ON trades(mode, ts);
+CREATE INDEX IF NOT EXISTS ix_trades_reason ON trades(reason, ts);
+"""
+
+# CSV 가져오기 시 같은 거래 판별용: 초 단위 시각 + CSV 로그와 같은 소수 둘째 자리 가격
+# (실시간 기록은 같은 초/같은 가격의 분할 체결도 모두 남기므로 유일 인덱스로 두지 않음)
+KEY_INDEX = """
+CREATE INDEX IF NOT EXISTS ix_trades_key ON trades(bot, side, CAST(ts AS INTEGER), ticker, ROUND(price, 2));
+"""
+
+# 이전 버전 DB 정리: 유일 인덱스 제거, 통화 컬럼 채우기
+MIGRATE = """
+DROP INDEX IF EXISTS ux_trades_dedupe;
+DROP INDEX IF EXISTS ux_trades_key;
+UPDATE trades SET currency = CASE WHEN bot = 'stock' AND ticker GLOB '*[^0-9]*' THEN 'USD' ELSE 'KRW' END WHERE currency = '';
+"""
+
+COLUMNS = ("ts", "day", "bot", "mode", "side", "ticker", "price", "qty", "amount",
+           "buy_price", "profit_rate", "profit_amount", "held_min", "reason", "rsi", "currency")
+
+GROUP_KEYS = {"day": "day", "ticker": "ticker", "reason": "reason", "mode": "mode"}
+
+WINS = "CAST(TOTAL(profit_rate > 0) AS INTEGER)"  # 승리 횟수 (pnl/win_rate 공통, 행이 없어도 0)
+
+
+class TradeStore:
+    """
+    거래 내역 SQLite 저장소 (WAL 모드).
+    record_trade() 는 메모리에 쌓기만 하고, trade_journal 백그라운드 스레드가 flush() 로 한 트랜잭션에 일괄 기록한다.
+    손익은 통화(KRW/USD)별로 따로 집계한다.
+    """
+    def __init__(self, path="trades.db"):
+        self.path = path
+        self.lock = threading.Lock()      # 대기열 보호 (주문 경로에서 짧게 보유)
+        self.db_lock = threading.Lock()   # 기록용 연결 보호
+        self.pending = []
+        self.local = threading.local()
+        self.query_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="trade-query")  # API 조회 전용 (스레드별 읽기 연결 수 제한)
+        self.conn = self._connect()
+        self.conn.executescript(SCHEMA)
+        if "currency" not in {r[1] for r in self.conn.execute("PRAGMA table_info(trades)")}:
+            self.conn.execute("ALTER TABLE trades ADD COLUMN currency TEXT NOT NULL DEFAULT ''")
+        if self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'ix_trades_key'").fetchone() is None:
+            self.conn.executescript(MIGRATE)
+        self.conn.executescript(KEY_INDEX)
+        self.conn.commit()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self):
+        # 조회는 스레드별 연결 사용 (WAL 이므로 기록 중에도 읽기 가능)
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = self.local.conn = self._connect()
+            conn.row_factory = sqlite3.Row
+        return conn
+
+    def record_trade(self, bot, side, ticker, price, mode="", qty=None, amount=None, buy_price=None,
+                     profit_rate=None, profit_amount=None, held_min=None, reason="", rsi=None, ts=None, currency="KRW"):
+        """거래 1건을 기록 대기열에 추가 (파일 I/O 없음). ts 는 CSV 로그와 같은 초 단위로 저장"""
+        ts = int(ts or time.time())
+        row = (ts, datetime.fromtimestamp(ts).strftime('%Y-%m-%d'), bot, mode or "", side, ticker,
+               _num(price), _num(qty), _num(amount), _num(buy_price), _num(profit_rate),
+               _num(profit_amount), _num(held_min), reason or "", _num(rsi), currency or "")
+        with self.lock: self.pending.append(row)
+        trade_journal.start()
+
+    def flush(self):
+        with self.lock:
+            rows, self.pending = self.pending, []
+        if rows: self.insert_many(rows)
+
+    def insert_many(self, rows):
+        """(COLUMNS 순서의 튜플) 목록을 한 트랜잭션으로 기록. 추가된 행 수 반환"""
+        sql = f"INSERT INTO trades ({','.join(COLUMNS)}) VALUES ({','.join('?' * len(COLUMNS))})"
+        with self.db_lock:
+            before = self.conn.total_changes
+            with self.conn:
+                self.conn.executemany(sql, rows)
+            return self.conn.total_changes - before
+
+    def import_rows(self, rows):
+        """
+        CSV 가져오기용 기록: 같은 거래(bot, side, 초 단위 시각, 종목, 소수 둘째 자리 가격)가 이미 있는 개수만큼 건너뛰고 나머지만 추가.
+        같은 초/같은 가격의 분할 체결은 개수로 구분되므로 누락되지 않는다. 추가된 행 수 반환
+        """
+        col = {c: i for i, c in enumerate(COLUMNS)}
+        groups = {}
+        for r in rows:
+            price = r[col["price"]]
+            key = (r[col["bot"]], r[col["side"]], int(r[col["ts"]]), r[col["ticker"]], None if price is None else round(price, 2))
+            groups.setdefault(key, []).append(r)
+        count_sql = ("SELECT COUNT(*) FROM trades WHERE bot = ? AND side = ? AND CAST(ts AS INTEGER) = ? "
+                     "AND ticker = ? AND ROUND(price, 2) IS ROUND(?, 2)")
+        sql = f"INSERT INTO trades ({','.join(COLUMNS)}) VALUES ({','.join('?' * len(COLUMNS))})"
+        with self.db_lock:
+            before = self.conn.total_changes
+            with self.conn:
+                for (bot, side, ts, ticker, _), group in groups.items():
+                    have = self.conn.execute(count_sql, (bot, side, ts, ticker, group[0][col["price"]])).fetchone()[0]
+                    self.conn.executemany(sql, group[have:])
+            return self.conn.total_changes - before
+
+    async def query(self, fn, *args, **kwargs):
+        """pnl/win_rate 같은 조회를 query_pool 에서 실행 (이벤트 루프를 막지 않음)"""
+        return await asyncio.get_running_loop().run_in_executor(self.query_pool, functools.partial(fn, *args, **kwargs))
+
+    def _where(self, bot=None, mode=None, ticker=None, reason=None, since=None, until=None, currency=None):
+        cond, args = ["side = 'SELL'"], []
+        for col, val in (("bot", bot), ("mode", mode), ("ticker", ticker), ("reason", reason), ("currency", currency)):
+            if val:
+                cond.append(f"{col} = ?")
+                args.append(val)
+        if since:
+            cond.append("day >= ?")
+            args.append(since)
+        if until:
+            cond.append("day <= ?")
+            args.append(until)
+        return " AND ".join(cond), args
+
+    def pnl(self, group="day", **filters):
+        """매도 기준 손익 집계 (group: day / ticker / reason / mode, 통화별로 행 분리)"""
+        key = GROUP_KEYS.get(group)
+        if key is None: raise ValueError(f"group must be one of {list(GROUP_KEYS)}")
+        where, args = self._where(**filters)
+        sql = (f"SELECT {key} AS key, currency, COUNT(*) AS trades, {WINS} AS wins, "
+               f"TOTAL(profit_amount) AS pnl, AVG(profit_rate) AS avg_profit_rate "
+               f"FROM trades WHERE {where} GROUP BY {key}, currency ORDER BY {key}, currency")
+        return [dict(r) for r in self._reader().execute(sql, args)]
+
+    def win_rate(self, **filters):
+        """매도 기준 승률 (pnl 은 {통화: 손익})"""
+        where, args = self._where(**filters)
+        sql = (f"SELECT currency, COUNT(*) AS trades, {WINS} AS wins, TOTAL(profit_amount) AS pnl "
+               f"FROM trades WHERE {where} GROUP BY currency")
+        rows = self._reader().execute(sql, args).fetchall()
+        trades, wins = sum(int(r["trades"]) for r in rows), sum(int(r["wins"]) for r in rows)
+        return {"trades": trades, "wins": wins, "pnl": {r["currency"]: r["pnl"] for r in rows},
+                "win_rate": round(wins / trades * 100, 2) if trades else 0.0}
+
+
+def _num(v):
+    if v is None or v == "": return None
+    try: return float(str(v).rstrip('%'))
+    except ValueError: return None
+
+def _ts(s):
+    return datetime.strptime(s.strip(), '%Y-%m-%d %H:%M:%S').timestamp()
+
+
+LEGACY_LOGS = ("trade_buy_log.csv", "trade_sell_log.csv", "trade_log.csv")
+
+
+def import_csv_logs(store, paths=None, stock_mode="paper"):
+    """
+    일자별 분리 이전의 CSV 로그(trade_buy_log.csv, trade_sell_log.csv, trade_log.csv)를 SQLite 로 가져오기.
+    일자별 파일(trade_*_YYYYMMDD.csv)은 기록 시 저장소에도 함께 들어가므로 기본 대상에서 제외한다.
+    헤더로 형식을 구분하며, 이미 들어간 행은 건너뛴다. stock_trade 로그에는 모드가 없으므로 stock_mode 로 지정. 가져온 행 수 반환
+    """
+    if paths is None:
+        paths = [p for p in LEGACY_LOGS if os.path.exists(p)]
+    total = 0
+    for path in paths:
+        rows = []
+        try:
+            with open(path, newline='', encoding='utf-8') as f:
+                for r in csv.DictReader(f):
+                    try: rows.append(_csv_row(r, stock_mode))
+                    except (KeyError, ValueError, TypeError): continue
+        except OSError as e:
+            print(f"[ERROR] {path} 읽기 실패: {e}")
+            continue
+        rows = [r for r in rows if r]
+        n = store.import_rows(rows) if rows else 0
+        print(f"[INFO] {path}: {n}/{len(rows)}건 추가")
+        total += n
+    return total
+
+def _csv_row(r, stock_mode=""):
+    def row(**kw):
+        ts = kw["ts"]
+        vals = {c: None for c in COLUMNS}
+        vals.update(kw, day=datetime.fromtimestamp(ts).strftime('%Y-%m-%d'))
+        vals["mode"] = vals["mode"] or ""
+        vals["reason"] = vals["reason"] or ""
+        vals["currency"] = vals["currency"] or "KRW"
+        return tuple(vals[c] for c in COLUMNS)
+
+    if "sell_price" in r:  # fast_trade 매도 로그
+        return row(ts=_ts(r["timestamp"]), bot="crypto", mode=r["mode"], side="SELL", ticker=r["ticker"],
+                   price=_num(r["sell_price"]), buy_price=_num(r["buy_price"]), profit_rate=_num(r["profit_rate"]),
+                   profit_amount=_num(r["profit_amount"]), held_min=_num(r["held_time"]), reason=r["reason"])
+    if "buy_price" in r:  # fast_trade 매수 로그
+        return row(ts=_ts(r["timestamp"]), bot="crypto", mode=r["mode"], side="BUY", ticker=r["ticker"],
+                   price=_num(r["buy_price"]), amount=_num(r["amount"]), reason=r["reason"], rsi=_num(r.get("rsi")))
+    if "Type" in r:  # stock_trade 거래 로그 (매수가 미기록 -> 수익률로 역산)
+        side, price, qty, rate = r["Type"].upper(), _num(r["Price"]), _num(r["Qty"]), _num(r["ProfitRate"])
+        buy_price = profit_amount = None
+        if side == "SELL" and price and rate is not None and rate > -100:
+            buy_price = price / (1 + rate / 100)
+            profit_amount = (price - buy_price) * (qty or 0)
+        code = r["Code"]
+        return row(ts=_ts(r["Time"]), bot="stock", mode=stock_mode, side=side, ticker=code, price=price, qty=qty,
+                   currency="KRW" if code.isdigit() else "USD", buy_price=buy_price, profit_rate=rate if side == "SELL" else None,
+                   profit_amount=profit_amount, reason=r["Reason"])
+    return None
+
+
+# 두 봇이 함께 쓰는 공용 저장소 (기록은 trade_journal flush 주기에 맞춰 일괄 처리)
+store = TradeStore(os.environ.get("TRADE_DB_PATH", "trades.db"))
+trade_journal.add_flush_hook(store.flush)
+
+
+if __name__ == "__main__":
+    # 사용법: python trade_store.py import [--stock-mode real|paper] [csv 파일 ...]
+    args = sys.argv[2:]
+    stock_mode = "paper"
+    if args[:1] == ["--stock-mode"] and len(args) >= 2:
+        stock_mode, args = args[1], args[2:]
+    if len(sys.argv) >= 2 and sys.argv[1] == "import":
+        n = import_csv_logs(store, args or None, stock_mode=stock_mode)
+        print(f"[INFO] 총 {n}건 가져오기 완료")
+    else:
+        print("usage: python trade_store.py import [--stock-mode real|paper] [csv ...]")
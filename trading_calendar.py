@@ -0,0 +1,143 @@
+import datetime
+import json
+import threading
+from zoneinfo import ZoneInfo
+
+from state_journal import atomic_write_json
+
+# 시장별 정규장 (시간대, 개장, 마감)
+SESSIONS = {
+    "domestic": (ZoneInfo("Asia/Seoul"), datetime.time(9, 0), datetime.time(15, 20)),
+    "overseas": (ZoneInfo("America/New_York"), datetime.time(9, 30), datetime.time(16, 0)),
+}
+
+
+def _nth_weekday(year, month, weekday, n):
+    """month 의 n 번째 weekday (n=-1 이면 마지막)"""
+    if n > 0:
+        d = datetime.date(year, month, 1)
+        return d + datetime.timedelta(days=(weekday - d.weekday()) % 7 + 7 * (n - 1))
+    d = datetime.date(year + month // 12, month % 12 + 1, 1) - datetime.timedelta(days=1)
+    return d - datetime.timedelta(days=(d.weekday() - weekday) % 7)
+
+
+def _observed(d):
+    """주말 휴일의 대체 휴장일 (토 -> 금, 일 -> 월)"""
+    if d.weekday() == 5: return d - datetime.timedelta(days=1)
+    if d.weekday() == 6: return d + datetime.timedelta(days=1)
+    return d
+
+
+def _easter(year):
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 19 * l) // 433
+    month = (h + l - 7 * m + 90) // 25
+    return datetime.date(year, month, (h + l - 7 * m + 33 * month + 19) % 32)
+
+
+def us_holidays(year):
+    """NYSE 정규 휴장일 (조기 폐장은 반영하지 않음)"""
+    days = {
+        _nth_weekday(year, 1, 0, 3),  # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),  # Presidents' Day
+        _easter(year) - datetime.timedelta(days=2),  # Good Friday
+        _nth_weekday(year, 5, 0, -1),  # Memorial Day
+        _nth_weekday(year, 9, 0, 1),  # Labor Day
+        _nth_weekday(year, 11, 3, 4),  # Thanksgiving
+        _observed(datetime.date(year, 7, 4)),
+        _observed(datetime.date(year, 12, 25)),
+    }
+    if year >= 2022: days.add(_observed(datetime.date(year, 6, 19)))  # Juneteenth
+    new_year = datetime.date(year, 1, 1)
+    if new_year.weekday() != 5: days.add(_observed(new_year))  # 토요일이면 전년도 금요일 대체 없음 (NYSE 규칙)
+    return days
+
+
+class TradingCalendar:
+    """
+    거래 캘린더.
+    국내 개장일표는 chk_holiday(1일 1회 호출 권장)로 받아 calendar_cache.json 에 저장해 두고, 조회는 하루 최대 한 번만 한다.
+    미국 휴장일은 NYSE 규칙으로 계산한다. 개장일표가 없는 날짜는 평일이면 개장으로 본다.
+    fetch(bass_dt) 는 chk_holiday 결과 DataFrame(bass_dt, opnd_yn) 을 반환하는 함수.
+    """
+    def __init__(self, path="calendar_cache.json", fetch=None, min_ahead_days=5):
+        self.path = path
+        self.fetch = fetch
+        self.min_ahead_days = min_ahead_days
+        self.lock = threading.Lock()
+        self.open_days = {}  # 'YYYYMMDD' -> 국내 개장일 여부
+        self.fetched_on = None  # 마지막 조회 시도 일자 (KST)
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.open_days = {k: bool(v) for k, v in data.get("open_days", {}).items()}
+            self.fetched_on = data.get("fetched_on")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[WARN] 거래 캘린더 캐시 로드 실패: {e}")
+
+    def refresh(self):
+        """오늘(KST) 이후 개장일표가 min_ahead_days 일 미만 남았으면 chk_holiday 조회 (하루 최대 1회)"""
+        today_kst = datetime.datetime.now(SESSIONS["domestic"][0]).date()
+        today = today_kst.strftime("%Y%m%d")
+        ahead = [k for k in self.open_days if k >= today]
+        if len(ahead) >= self.min_ahead_days or self.fetch is None or self.fetched_on == today: return
+        with self.lock:
+            if self.fetched_on == today: return
+            self.fetched_on = today
+            try:
+                df = self.fetch(today)
+                if df is not None and not df.empty:
+                    for row in df.to_dict("records"):
+                        self.open_days[str(row["bass_dt"])] = row.get("opnd_yn") == "Y"
+                    # 지난 달 이전 기록은 정리
+                    cutoff = (today_kst - datetime.timedelta(days=31)).strftime("%Y%m%d")
+                    self.open_days = {k: v for k, v in self.open_days.items() if k >= cutoff}
+            except Exception as e:
+                print(f"[ERROR] 휴장일 조회 실패: {e}")
+            try: atomic_write_json(self.path, {"fetched_on": self.fetched_on, "open_days": self.open_days}, indent=None)
+            except Exception as e: print(f"[ERROR] 거래 캘린더 캐시 저장 실패: {e}")
+
+    def is_trading_day(self, market, day):
+        if market == "domestic":
+            known = self.open_days.get(day.strftime("%Y%m%d"))
+            if known is not None: return known
+        return day.weekday() < 5 and not (market == "overseas" and day in us_holidays(day.year))
+
+    def session(self, market, day):
+        """day 의 정규장 (개장, 마감) 시각 (시장 시간대 aware datetime)"""
+        tz, start, end = SESSIONS[market]
+        return datetime.datetime.combine(day, start, tz), datetime.datetime.combine(day, end, tz)
+
+    def is_open(self, market, now=None):
+        tz = SESSIONS[market][0]
+        now = datetime.datetime.now(tz) if now is None else now.astimezone(tz)
+        if not self.is_trading_day(market, now.date()): return False
+        start, end = self.session(market, now.date())
+        return start <= now <= end
+
+    def next_open(self, market, now=None):
+        """다음 정규장 개장 시각 (장중이면 now 반환)"""
+        tz = SESSIONS[market][0]
+        now = datetime.datetime.now(tz) if now is None else now.astimezone(tz)
+        if self.is_open(market, now): return now
+        day = now.date()
+        for _ in range(30):
+            if self.is_trading_day(market, day):
+                start, _end = self.session(market, day)
+                if start > now: return start
+            day += datetime.timedelta(days=1)
+        return now + datetime.timedelta(days=1)
+
+    def seconds_until_open(self, market, now=None):
+        now = datetime.datetime.now(datetime.timezone.utc) if now is None else now
+        return max(0.0, (self.next_open(market, now) - now).total_seconds())